@@ -0,0 +1,120 @@
+import os
+import time
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+"""
+Writes many twelve-tone reports(see music_xml_writer.write_twelvetone_report()) at once
+in a pool of worker processes.
+
+The workers are started once and import music21 when they start, so every report after the first
+one only pays for building and writing its own score. A batch_report_writer can be reused for
+several batches while its workers stay alive.
+
+Every job is a (prime_row, file_name) or (prime_row, file_name, options) tuple, where options is a
+dictionary of keyword arguments of write_twelvetone_report(), e.g.
+{"directory": "./reports", "score_title": "Op. 25", "include_combinatorials": False, "backend": "template"}
+
+Example:
+    with batch_report_writer(workers=8, directory="./reports") as writer:
+        summary = writer.write_reports((prime_row, f"row_{i}.musicxml") for i, prime_row in enumerate(prime_rows))
+    print(summary.failed)
+"""
+@dataclass
+class report_status:
+    file_name: str
+    succeeded: bool
+    seconds: float #time spent writing the report in its worker
+    error: str = None
+
+
+@dataclass
+class batch_report_summary:
+    reports: list = field(default_factory=list) #report_status of every job, in job order
+    seconds: float = 0.0 #wall-clock time of the whole batch
+
+    @property
+    def succeeded(self) -> int:
+        return sum(report.succeeded for report in self.reports)
+
+    @property
+    def failed(self) -> list:
+        return [report for report in self.reports if report.succeeded == False]
+
+
+class batch_report_writer():
+
+    def __init__(self, workers = None, directory = None, backend = "music21"):
+        """
+        Starts workers(defaults to the number of CPUs) worker processes.
+        directory and backend are used for every job whose options do not specify them.
+        """
+        if workers is None:
+            workers = os.cpu_count()
+        if workers < 1:
+            raise ValueError(f"Invalid number of workers({workers}), at least one worker is required")
+        self.__workers = workers
+        self.__default_options = {"directory": directory, "backend": backend}
+        self.__executor = ProcessPoolExecutor(workers, initializer=batch_report_writer.worker_initializer)
+
+    def write_reports(self, jobs) -> batch_report_summary:
+        """
+        Writes the report of every (prime_row, file_name[, options]) job in jobs
+        and returns the status of every report.\n
+
+        Jobs are read from jobs as workers become free, so jobs can be a generator of any length.
+        A failed report does not stop the batch, its error is stored in its report_status.
+        """
+        if self.__executor is None:
+            raise ValueError("Reports cannot be written after the batch_report_writer is closed")
+        summary = batch_report_summary()
+        start_time = time.perf_counter()
+        pending_reports = deque()
+        for job in jobs:
+            prime_row, file_name, *options = job
+            options = {**self.__default_options, **(options[0] if options and options[0] is not None else {})}
+            pending_reports.append(self.__executor.submit(batch_report_writer.write_report, np.asarray(prime_row), file_name, options))
+            #limits the number of jobs waiting for a worker
+            if len(pending_reports) >= 2 * self.__workers:
+                summary.reports.append(pending_reports.popleft().result())
+        while pending_reports:
+            summary.reports.append(pending_reports.popleft().result())
+        summary.seconds = time.perf_counter() - start_time
+        return summary
+
+    def close(self):
+        """
+        Stops the worker processes
+        """
+        if self.__executor is not None:
+            self.__executor.shutdown(cancel_futures=True)
+            self.__executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @classmethod
+    def worker_initializer(cls):
+        """
+        Imports music21(and builds the measure template) once in every worker process
+        """
+        import music21
+        from music_xml_writer import music_xml_writer
+        music_xml_writer.measure_template()
+
+    @classmethod
+    def write_report(cls, prime_row: np.ndarray, file_name: str, options: dict) -> report_status:
+        """
+        Writes a single report inside a worker process
+        """
+        from music_xml_writer import music_xml_writer
+        start_time = time.perf_counter()
+        try:
+            music_xml_writer.write_twelvetone_report(prime_row, file_name, **options, verbose=False)
+        except Exception as error:
+            return report_status(file_name, False, time.perf_counter() - start_time, f"{type(error).__name__}: {error}")
+        return report_status(file_name, True, time.perf_counter() - start_time)
@@ -0,0 +1,103 @@
+import io
+import os
+import zipfile
+import numpy as np
+from music_xml_template_writer import music_xml_template_writer
+from tone_row import tone_row
+"""
+Writes a catalogue score: one part for every form(e.g. all 48 forms) of every tone row
+in a list of tone rows, as a single MusicXML document.
+
+The part list is written first, then every part is written to disk as soon as it is created,
+so only the notes of the current part are held in memory(see music_xml_template_writer).
+The score can be written as a compressed .mxl file, which is zipped in the same pass.
+
+Example(every row in a file of tone rows):
+    prime_rows = np.loadtxt("all_combinatorial_rows.txt", dtype=np.uint8)
+    catalogue_score_writer.write_catalogue(prime_rows, "all_combinatorial_rows.mxl")
+"""
+class catalogue_score_writer():
+
+    mxl_mimetype = "application/vnd.recordare.musicxml"
+    mxl_container_template = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<container>\n'
+        '  <rootfiles>\n'
+        '    <rootfile full-path="{score_name}" media-type="application/vnd.recordare.musicxml+xml" />\n'
+        '  </rootfiles>\n'
+        '</container>\n'
+    )
+
+    @classmethod
+    def write_catalogue(cls, prime_rows: np.ndarray, output, score_title = None, forms = None, row_names = None, mxl = None) -> int:
+        """
+        Writes a part named "<row name> <form>" for every form of every prime row
+        and returns the number of parts.\n
+
+        Args:
+            prime_rows: (N, 12) array of tone rows
+            output: file path or file-like object opened in binary mode
+            forms (list): transformation names(see tone_row.transformation_names()), defaults to all 48 forms
+            row_names (list): name of every prime row, defaults to "Row 1", "Row 2", ...
+            mxl (bool): write a compressed .mxl file instead of a .musicxml file.
+                Defaults to True if output is a path ending with '.mxl'.
+        """
+        prime_rows = np.asarray(prime_rows, dtype=np.uint8).reshape(-1, 12)
+        if forms is None:
+            forms = tone_row.transformation_names()
+        invalid_forms = [form for form in forms if form not in tone_row.transformation_names()]
+        if invalid_forms:
+            raise ValueError(f"Invalid transformation names: {invalid_forms}")
+        if row_names is None:
+            row_names = [f"Row {i + 1}" for i in range(len(prime_rows))]
+        if len(row_names) != len(prime_rows):
+            raise ValueError(f"Number of row names({len(row_names)}) does not match the number of rows({len(prime_rows)})")
+        if score_title is None:
+            score_title = "Twelve-tone Row Catalogue"
+        if mxl is None:
+            mxl = isinstance(output, (str, os.PathLike)) and os.fspath(output).endswith(".mxl")
+
+        if isinstance(output, (str, os.PathLike)):
+            with open(output, "wb") as output_file:
+                return cls.write_catalogue_to(prime_rows, output_file, score_title, forms, row_names, mxl, cls.score_name(output))
+        return cls.write_catalogue_to(prime_rows, output, score_title, forms, row_names, mxl)
+
+    @classmethod
+    def write_catalogue_to(cls, prime_rows: np.ndarray, binary_file, score_title: str, forms: list, row_names: list, mxl: bool, score_name = "score.musicxml") -> int:
+        if mxl == False:
+            return cls.write_score(prime_rows, binary_file, score_title, forms, row_names)
+        with zipfile.ZipFile(binary_file, "w", zipfile.ZIP_DEFLATED) as mxl_file:
+            #the mimetype must be the first, uncompressed file of the archive
+            mxl_file.writestr(zipfile.ZipInfo("mimetype"), cls.mxl_mimetype, compress_type=zipfile.ZIP_STORED)
+            mxl_file.writestr("META-INF/container.xml", cls.mxl_container_template.format(score_name=score_name))
+            with mxl_file.open(score_name, "w", force_zip64=True) as score_file:
+                return cls.write_score(prime_rows, score_file, score_title, forms, row_names)
+
+    @classmethod
+    def write_score(cls, prime_rows: np.ndarray, binary_file, score_title: str, forms: list, row_names: list) -> int:
+        """
+        Writes the MusicXML document to a file-like object opened in binary mode
+        """
+        text_file = io.TextIOWrapper(binary_file, encoding="utf-8", newline="")
+        try:
+            part_names = (f"{row_name} {form}" for row_name in row_names for form in forms)
+            part_ids = iter(music_xml_template_writer.write_score_header(text_file, score_title, part_names))
+            form_indices = [tone_row.transformation_names().index(form) for form in forms]
+            part_number = 0
+            for prime_row in prime_rows:
+                row_forms = tone_row.all_transformations(prime_row)[form_indices]
+                for form in row_forms:
+                    part_number += 1
+                    music_xml_template_writer.write_part(text_file, part_number, next(part_ids), form)
+            text_file.write(music_xml_template_writer.document_end)
+            text_file.flush()
+        finally:
+            text_file.detach()
+        return part_number
+
+    @classmethod
+    def score_name(cls, output_path) -> str:
+        """
+        Returns the name of the MusicXML file inside an .mxl file
+        """
+        return os.path.splitext(os.path.basename(os.fspath(output_path)))[0] + ".musicxml"
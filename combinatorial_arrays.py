@@ -0,0 +1,101 @@
+import numpy as np
+from combinatoriality import combinatoriality
+from row_search import row_search
+from tone_row import tone_row
+"""
+Combinatorial arrays: sets of forms of a tone row that can sound together as voices, because their vertically aligned
+segments always complete the aggregate(all 12 notes).
+
+With segment size s, an array has 12 / s forms(e.g. 3 voices of tetrachords or 4 voices of trichords), and
+the segments of the forms at every position hold different notes. Arrays are built one form at a time from the
+segment masks of the 48 forms(see combinatoriality.segment_masks()): a form can only be added if none of its segments
+shares a note with the segments already at the same positions, which prunes almost every combination early.
+
+Every array is a row of form indices in ascending order(see tone_row.transformation_names()), and arrays are
+yielded in ascending order while the search is running.
+
+Example(three-voice tetrachordal arrays that include P0):
+    for arrays in combinatorial_arrays.search_arrays(prime_row, 4, required_forms=["P0"]):
+        print(combinatorial_arrays.form_names(arrays))
+"""
+class combinatorial_arrays():
+
+    @classmethod
+    def search_arrays(cls, prime_row: np.ndarray, segment_size = 4, forms = None, required_forms = None, block_size = 65_536, limit = None):
+        """
+        Yields (N, 12 / segment_size) uint8 arrays of form indices, each row being one combinatorial array,
+        with at most block_size arrays per block.\n
+
+        Args:
+            segment_size: 6(2 forms), 4(3 forms), 3(4 forms) or 2(6 forms)
+            forms: names of the forms that can be used(e.g. ["P0", "I5", ...]), defaults to all 48 forms
+            required_forms: names of the forms that every array must include
+            limit: stop after this many arrays
+        """
+        if segment_size not in (6, 4, 3, 2):
+            raise ValueError(f"Invalid segment size({segment_size}), segment size must be 6, 4, 3 or 2")
+        allowed_forms = cls.form_indices(forms, np.ones(48, dtype=bool))
+        required_forms = cls.form_indices(required_forms, np.zeros(48, dtype=bool))
+        if (required_forms & ~allowed_forms).any():
+            raise ValueError("Every required form must be one of the allowed forms")
+        form_count = 12 // segment_size
+        segment_masks = combinatoriality.segment_masks(tone_row.all_transformations(prime_row), segment_size)
+        form_numbers = np.arange(48)
+        #number of required forms before every form
+        required_before = np.cumsum(np.concatenate([[0], required_forms]))
+
+        def extend(block: tuple) -> tuple:
+            form_count_so_far, arrays, used_notes, required_counts = block
+            next_form = arrays[:, -1].astype(np.int64) + 1 if form_count_so_far > 0 else np.zeros(len(arrays), dtype=np.int64)
+            valid = allowed_forms & (form_numbers >= next_form[:, None])
+            valid &= ((used_notes[:, None, :] & segment_masks) == 0).all(axis=-1)
+            #forms can only be added in ascending order, so no required form may be skipped
+            valid &= required_before[form_numbers] == required_counts[:, None]
+            parents, added_forms = np.nonzero(valid)
+            return (form_count_so_far + 1,
+                    np.concatenate([arrays[parents], added_forms[:, None].astype(np.uint8)], axis=1),
+                    used_notes[parents] | segment_masks[added_forms],
+                    required_counts[parents] + required_forms[added_forms])
+
+        def finish(block: tuple) -> np.ndarray:
+            return block[1][block[3] == required_forms.sum()]
+
+        #a partial array is (number of forms, form indices, combined segment masks, number of required forms)
+        first_block = (0, np.zeros((1, 0), dtype=np.uint8), np.zeros((1, form_count), dtype=np.uint16), np.zeros(1, dtype=np.int64))
+        yield from row_search.depth_first_search(first_block, extend, form_count, finish, block_size, limit)
+
+    @classmethod
+    def find_arrays(cls, prime_row: np.ndarray, segment_size = 4, **options) -> np.ndarray:
+        """
+        Returns an (N, 12 / segment_size) uint8 array of every combinatorial array(see search_arrays())
+        """
+        return np.concatenate([np.zeros((0, 12 // segment_size), dtype=np.uint8), *cls.search_arrays(prime_row, segment_size, **options)])
+
+    @classmethod
+    def count_arrays(cls, prime_row: np.ndarray, segment_size = 4, **options) -> int:
+        return sum(len(arrays) for arrays in cls.search_arrays(prime_row, segment_size, **options))
+
+    @classmethod
+    def form_names(cls, arrays: np.ndarray) -> list:
+        """
+        Returns the transformation names of the forms of every array
+        """
+        transformation_names = tone_row.transformation_names()
+        return [[transformation_names[form] for form in array] for array in np.asarray(arrays).reshape(-1, np.shape(arrays)[-1]).tolist()]
+
+    @classmethod
+    def array_forms(cls, prime_row: np.ndarray, arrays: np.ndarray) -> np.ndarray:
+        """
+        Returns the tone rows of the forms of every array, (N, k) -> (N, k, 12)
+        """
+        return tone_row.all_transformations(prime_row)[np.asarray(arrays, dtype=np.intp)]
+
+    @classmethod
+    def form_indices(cls, form_names, default: np.ndarray) -> np.ndarray:
+        """
+        Returns a (48,) bool array that is True at the index of every name in form_names
+        """
+        if form_names is None:
+            return default
+        form_mask = combinatoriality.transformations_to_mask(form_names)
+        return np.array([form_mask >> form & 1 for form in range(48)], dtype=bool)
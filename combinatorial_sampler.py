@@ -0,0 +1,133 @@
+import numpy as np
+from combinatoriality import combinatoriality
+from random_rows import random_rows
+from tone_row import tone_row
+"""
+Uniformly random tone rows with given combinatorial transformations, without rejection sampling.
+
+Whether a row is combinatorial at a segment size only depends on its "signature":
+the notes of each segment(regardless of their order), its first note and its last note.
+Every signature belongs to the same number of rows, so a uniformly random row that meets a constraint is
+a uniformly random signature that meets it, with its notes shuffled within their segments
+(keeping the first and last note in place).
+
+The signatures of a segment size and their combinatorial masks(see combinatoriality.combinatorial_masks())
+are calculated the first time a segment size is used and kept for the rest of the process:
+    segment size 6: 33,264 signatures(~0.1 s), 4: 554,400 signatures(~2 s), 3: 3,326,400 signatures(~15 s)
+
+Example(100,000 rows that are hexachordally combinatorial at I5):
+    tone_rows = combinatorial_sampler.sample_rows(100_000, ["I5"], 6, random_generator=1)
+"""
+class combinatorial_sampler():
+
+    _signature_tables = {}
+
+    @classmethod
+    def sample_rows(cls, row_count: int, combinatorials, segment_size = 6, random_generator = None, exact = False, fix_first_note = False) -> np.ndarray:
+        """
+        Returns a (row_count, 12) uint8 array of tone rows, chosen uniformly from all rows that
+        are combinatorial(at segment_size) at every transformation in combinatorials.\n
+
+        Args:
+            combinatorials: transformation names(e.g. ["I5", "R6"]) or a uint64 mask ordered as tone_row.transformation_names()
+            random_generator: numpy.random.Generator, seed or None(see random_rows)
+            exact (bool): rows must not have any other combinatorial transformation at segment_size
+            fix_first_note (bool): only sample rows that start on note 0
+        """
+        if row_count == 0:
+            #checks the arguments without building the signature table
+            combinatoriality.transformations_to_mask(combinatorials)
+            if segment_size not in (6, 4, 3):
+                raise ValueError(f"Invalid segment size({segment_size}), segment size must be 6, 4 or 3")
+            return np.zeros((0, 12), dtype=np.uint8)
+        signature_rows = cls.signature_rows(segment_size)
+        qualifying = cls.qualifying_signatures(combinatorials, segment_size, exact, fix_first_note)
+        if len(qualifying) == 0:
+            raise ValueError("No tone row meets the combinatorial constraint")
+        random_generator = random_rows.as_generator(random_generator)
+        tone_rows = signature_rows[qualifying[random_generator.integers(0, len(qualifying), size=row_count)]]
+
+        #shuffles the notes of every segment, except for the first and the last note of the row
+        tone_rows[:, 1:segment_size] = random_generator.permuted(tone_rows[:, 1:segment_size], axis=1)
+        if segment_size < 6:
+            middle_segments = tone_rows[:, segment_size:12 - segment_size].reshape(row_count, (12 - 2 * segment_size) // segment_size, segment_size)
+            tone_rows[:, segment_size:12 - segment_size] = random_generator.permuted(middle_segments, axis=2).reshape(row_count, 12 - 2 * segment_size)
+        tone_rows[:, 12 - segment_size:11] = random_generator.permuted(tone_rows[:, 12 - segment_size:11], axis=1)
+        return tone_rows
+
+    @classmethod
+    def count_rows(cls, combinatorials, segment_size = 6, exact = False, fix_first_note = False) -> int:
+        """
+        Returns the number of tone rows that meet a constraint(see sample_rows())
+        """
+        segment_count = 12 // segment_size
+        rows_per_signature = np.prod(np.arange(1, segment_size), dtype=np.int64) ** 2 * np.prod(np.arange(1, segment_size + 1), dtype=np.int64) ** (segment_count - 2)
+        return int(len(cls.qualifying_signatures(combinatorials, segment_size, exact, fix_first_note)) * rows_per_signature)
+
+    @classmethod
+    def qualifying_signatures(cls, combinatorials, segment_size: int, exact = False, fix_first_note = False) -> np.ndarray:
+        """
+        Returns the indices of the signatures(see signature_rows()) that meet a constraint
+        """
+        required_mask = np.uint64(combinatoriality.transformations_to_mask(combinatorials))
+        signature_masks = cls.signature_masks(segment_size)
+        if exact:
+            matches = signature_masks == required_mask
+        else:
+            matches = (signature_masks & required_mask) == required_mask
+        if fix_first_note:
+            matches &= cls.signature_rows(segment_size)[:, 0] == 0
+        return np.flatnonzero(matches)
+
+    @classmethod
+    def signature_rows(cls, segment_size: int) -> np.ndarray:
+        """
+        Returns one tone row for every signature of a segment size: the notes of every segment in
+        ascending order, except that the chosen first note starts the row and the chosen last note ends it.
+        """
+        return cls.signature_table(segment_size)[0]
+
+    @classmethod
+    def signature_masks(cls, segment_size: int) -> np.ndarray:
+        """
+        Returns the combinatorial mask(see combinatoriality.combinatorial_masks()) of every signature
+        """
+        return cls.signature_table(segment_size)[1]
+
+    @classmethod
+    def signature_table(cls, segment_size: int) -> tuple:
+        if segment_size not in (6, 4, 3):
+            raise ValueError(f"Invalid segment size({segment_size}), segment size must be 6, 4 or 3")
+        if segment_size not in cls._signature_tables:
+            signature_rows = cls.create_signature_rows(segment_size)
+            cls._signature_tables[segment_size] = (signature_rows, combinatoriality.combinatorial_masks(signature_rows, segment_size))
+        return cls._signature_tables[segment_size]
+
+    @classmethod
+    def create_signature_rows(cls, segment_size: int) -> np.ndarray:
+        segment_count = 12 // segment_size
+        masks = np.arange(4096, dtype=np.uint16)
+        note_counts = ((masks[:, None] >> np.arange(12, dtype=np.uint16)) & 1).sum(axis=1)
+        segment_masks = masks[note_counts == segment_size]
+        #ordered partitions of the 12 notes into segments, built one segment at a time
+        partitions = segment_masks[:, None]
+        for _ in range(segment_count - 2):
+            used_notes = np.bitwise_or.reduce(partitions, axis=1)
+            partition_indices, mask_indices = np.nonzero((used_notes[:, None] & segment_masks[None, :]) == 0)
+            partitions = np.concatenate([partitions[partition_indices], segment_masks[mask_indices, None]], axis=1)
+        partitions = np.concatenate([partitions, (0xFFF ^ np.bitwise_or.reduce(partitions, axis=1))[:, None]], axis=1)
+
+        #notes of every segment in ascending order
+        note_bits = combinatoriality.note_bits()
+        ascending_notes = np.nonzero((partitions[..., None] & note_bits) != 0)[-1].astype(np.uint8)
+        partition_rows = ascending_notes.reshape(len(partitions), 12)
+
+        #every choice of first note(from the first segment) and last note(from the last segment)
+        signature_rows = []
+        for first_position in range(segment_size):
+            for last_position in range(12 - segment_size, 12):
+                rows = partition_rows.copy()
+                rows[:, [0, first_position]] = rows[:, [first_position, 0]]
+                rows[:, [11, last_position]] = rows[:, [last_position, 11]]
+                signature_rows.append(rows)
+        return np.concatenate(signature_rows)
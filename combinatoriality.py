@@ -1,8 +1,11 @@
 import numpy as np
+from tone_row import tone_row
 from twelve_tone_matrix import twelve_tone_matrix
 
 class combinatoriality():
     
+    _transposed_masks = None
+    
     @classmethod
     def find_hexachordal_combinatorials(cls, prime_row: np.ndarray, find_all = True, rows=False, retrogrades=False, inversions=False, inv_retrogrades=False) -> list:
         """
@@ -22,7 +25,7 @@ class combinatoriality():
             retrogrades = True
             inversions = True
             inv_retrogrades = True
-        reference_hexachord = prime_row[:6]
+        reference_hexachord = np.array(prime_row[:6])
         reference_hexachord.sort()
         hexachords = []
         if rows == False and retrogrades == False and inversions == False and inv_retrogrades == False:
@@ -198,4 +201,106 @@ class combinatoriality():
             if first_tetrachord_check and second_tetrachord_check and third_tetrachord_check and fourth_tetrachord_check:
                 combinatorial_transformations.append(twelve_tone_matrix.retrograde_inversion_order(prime_row)[i])
                 
-        return combinatorial_transformations
\ No newline at end of file
+        return combinatorial_transformations
+    
+    @classmethod
+    def segment_masks(cls, tone_rows: np.ndarray, segment_size: int) -> np.ndarray:
+        """
+        Returns the content of every segment of a tone row as a 12-bit pitch-class mask
+        (bit n is set if note n is in the segment).\n
+        
+        Works on arrays of any shape with tone rows along the last axis, e.g. (12,) -> (12/segment_size,)
+        and (N, 48, 12) -> (N, 48, 12/segment_size).\n
+        
+        Two segments share the same notes, regardless of order, if their masks are equal.
+        """
+        if 12 % segment_size != 0:
+            raise ValueError(f"Invalid segment size({segment_size}), segment size must divide 12")
+        tone_rows = np.asarray(tone_rows)
+        segments = tone_rows.reshape(tone_rows.shape[:-1] + (12 // segment_size, segment_size))
+        #notes within a segment are unique, so adding their bits is the same as combining them
+        return cls.note_bits()[segments].sum(axis=-1, dtype=np.uint16)
+    
+    @classmethod
+    def note_bits(cls) -> np.ndarray:
+        """
+        Returns a uint16 array where position n holds the mask bit of note n(1 << n).
+        """
+        return np.left_shift(1, np.arange(12, dtype=np.uint16), dtype=np.uint16)
+    
+    @classmethod
+    def transposed_masks(cls) -> np.ndarray:
+        """
+        Returns a (4096, 12) lookup table of segment masks transposed by 0-11 semitones.
+        i.e. transposed_masks()[mask, n] is the mask of the segment moved up by n semitones.\n
+        
+        The table is built on first use.
+        """
+        if cls._transposed_masks is None:
+            masks = np.arange(4096, dtype=np.uint16)[:, None]
+            semitones = np.arange(12, dtype=np.uint16)
+            cls._transposed_masks = ((masks << semitones) | (masks >> (12 - semitones))) & 0xFFF
+        return cls._transposed_masks
+    
+    @classmethod
+    def combinatorial_masks(cls, prime_rows: np.ndarray, segment_size: int) -> np.ndarray:
+        """
+        Returns the combinatorial transformations of one or more tone rows as uint64 bitmasks.\n
+        
+        Bit n is set if the transformation at position n of tone_row.transformation_names()
+        shares its hexachords(segment_size = 6), tetrachords(4) or trichords(3) with the prime row.
+        The prime row itself(P0) is never included.\n
+        
+        A (12,) row returns a single mask and an (N, 12) array returns N masks.
+        The set bits correspond to the lists returned by find_hexachordal_combinatorials(),
+        find_tetrachordal_combinatorials() and find_trichordal_combinatorials().
+        """
+        prime_rows = np.asarray(prime_rows, dtype=np.int16)
+        first_notes = prime_rows[..., :1]
+        last_notes = prime_rows[..., -1:]
+        #segments of R0, I0 and RI0 are derived from the segments of P0 and I0,
+        #all other transformations are transpositions of these four
+        row_segments = cls.segment_masks(prime_rows, segment_size)
+        inv_segments = cls.segment_masks((2 * first_notes - prime_rows) % 12, segment_size)
+        ret_segments = cls.transposed_masks()[np.flip(row_segments, axis=-1), (first_notes - last_notes) % 12]
+        ret_inv_segments = cls.transposed_masks()[np.flip(inv_segments, axis=-1), (last_notes - first_notes) % 12]
+        #order of stacked segments must match tone_row.transformation_names()
+        prime_segments = np.stack([row_segments, ret_segments, inv_segments, ret_inv_segments], axis=-2)
+        transformation_segments = cls.transposed_masks()[prime_segments[..., None, :], np.arange(12)[:, None]]
+        matches = np.all(transformation_segments == row_segments[..., None, None, :], axis=-1)
+        matches = matches.reshape(matches.shape[:-2] + (48,))
+        matches[..., 0] = False
+        return cls.pack_transformation_bits(matches)
+    
+    @classmethod
+    def pack_transformation_bits(cls, transformation_flags: np.ndarray) -> np.ndarray:
+        """
+        Packs boolean flags with shape (..., 48) into uint64 bitmasks,
+        where bit n holds flag n.
+        """
+        packed_bytes = np.packbits(transformation_flags, axis=-1, bitorder="little")
+        packed_bytes = np.concatenate([packed_bytes, np.zeros(packed_bytes.shape[:-1] + (2,), dtype=np.uint8)], axis=-1)
+        return np.ascontiguousarray(packed_bytes).view("<u8")[..., 0].astype(np.uint64)
+    
+    @classmethod
+    def mask_to_transformations(cls, combinatorial_mask: int) -> list:
+        """
+        Returns the transformation names that are set in a mask
+        returned by combinatorial_masks().
+        """
+        combinatorial_mask = int(combinatorial_mask)
+        return [name for i, name in enumerate(tone_row.transformation_names()) if combinatorial_mask >> i & 1]
+    
+    @classmethod
+    def transformations_to_mask(cls, transformation_names) -> int:
+        """
+        Returns a mask(see combinatorial_masks()) with the bit of every transformation name set,
+        masks are returned unchanged.
+        """
+        if isinstance(transformation_names, (int, np.integer)):
+            return int(transformation_names)
+        all_transformation_names = tone_row.transformation_names()
+        invalid_names = [name for name in transformation_names if name not in all_transformation_names]
+        if invalid_names:
+            raise ValueError(f"Invalid transformation names: {invalid_names}")
+        return sum(1 << all_transformation_names.index(name) for name in set(transformation_names))
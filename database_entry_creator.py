@@ -1,7 +1,7 @@
 import math
 import numpy as np
 import sqlite3
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from tone_row import tone_row
 from combinatoriality import combinatoriality
 """
@@ -178,6 +178,54 @@ class permutation_calculator():
         
         return tone_row
     
+    @classmethod
+    def find_permutations(cls, row_numbers: np.ndarray, row_length = 12, fix_first_note = False) -> np.ndarray:
+        """
+        Returns the tone rows located at an array of row numbers as a (N, row_length)
+        uint8 array.\n
+        
+        Produces the same rows as find_permutation(), but converts all row numbers at once
+        by reading them as factorial-base numbers(one digit per note) instead of
+        filtering the remaining notes for every note of every row.\n
+        
+        If fix_first_note = True, every row starts on note 0 and row numbers refer to the
+        (row_length - 1)! permutations of the remaining notes(the numbering used by
+        database_permutation_writer).
+        """
+        if fix_first_note:
+            remaining_notes = cls.find_permutations(row_numbers, row_length - 1) + 1
+            return np.hstack([np.zeros((len(remaining_notes), 1), dtype=np.uint8), remaining_notes])
+        row_numbers = np.asarray(row_numbers, dtype=np.int64).reshape(-1)
+        if row_numbers.size and (row_numbers.min() < 0 or row_numbers.max() >= math.factorial(row_length)):
+            raise ValueError(f"Invalid index number\n row numbers must be between 0 and {math.factorial(row_length) - 1}")
+        
+        #digit i is the index of note i within the notes that remain after notes 0..i-1 are extracted
+        tone_rows = np.zeros((len(row_numbers), row_length), dtype=np.uint8)
+        for i in range(row_length):
+            tone_rows[:, i] = row_numbers // math.factorial(row_length - 1 - i) % (row_length - i)
+        
+        #converts remaining-note indices into note numbers, working from the last note to the first
+        for i in range(row_length - 2, -1, -1):
+            tone_rows[:, i+1:] += tone_rows[:, i+1:] >= tone_rows[:, i:i+1]
+        
+        return tone_rows
+    
+    @classmethod
+    def find_row_numbers(cls, tone_rows: np.ndarray) -> np.ndarray:
+        """
+        Returns the row numbers of an array of tone rows with shape (N, row_length).\n
+        
+        Inverse of find_permutations().
+        """
+        tone_rows = np.atleast_2d(np.asarray(tone_rows))
+        row_length = tone_rows.shape[1]
+        row_numbers = np.zeros(len(tone_rows), dtype=np.int64)
+        for i in range(row_length - 1):
+            remaining_index = np.count_nonzero(tone_rows[:, i+1:] < tone_rows[:, i:i+1], axis=1)
+            row_numbers += remaining_index * math.factorial(row_length - 1 - i)
+        
+        return row_numbers
+    
     
 @dataclass
 class all_value_entry:
@@ -217,6 +265,72 @@ class create_database_entry():
         entry.combinatorial_trichords = tuple(combinatoriality.find_trichordal_combinatorials(entry.P0))
         
         return entry
+    
+    @classmethod
+    def all_values_columns(cls, first_row_number: int, last_row_number: int) -> "all_value_columns":
+        """
+        Returns the values of all_values_entry() for every row number in
+        [first_row_number, last_row_number) as one array per value.\n
+        
+        Combinatorials are stored as bitmasks(see combinatoriality.combinatorial_masks()).
+        """
+        return cls.row_values_columns(np.arange(first_row_number, last_row_number))
+    
+    @classmethod
+    def row_values_columns(cls, row_numbers: np.ndarray) -> "all_value_columns":
+        """
+        Returns the values of all_values_entry() for an array of row numbers
+        as one array per value.\n
+        
+        Combinatorials are stored as bitmasks(see combinatoriality.combinatorial_masks()).
+        """
+        columns = all_value_columns()
+        columns.row_number = np.asarray(row_numbers, dtype=np.uint64).reshape(-1)
+        columns.P0 = permutation_calculator.find_permutations(columns.row_number.astype(np.int64))
+        prime_transformations = tone_row.prime_transformations_array(columns.P0)
+        columns.R0 = prime_transformations[:, 1]
+        columns.I0 = prime_transformations[:, 2]
+        columns.RI0 = prime_transformations[:, 3]
+        #interval sizes of prime transformations 
+        columns.P0_intervals = tone_row.row_interval_sizes(columns.P0).astype(np.int8)
+        columns.R0_intervals = tone_row.row_interval_sizes(columns.R0).astype(np.int8)
+        columns.I0_intervals = tone_row.row_interval_sizes(columns.I0).astype(np.int8)
+        columns.RI0_intervals = tone_row.row_interval_sizes(columns.RI0).astype(np.int8)
+        #combinatorials
+        columns.combinatorial_hexachords = combinatoriality.combinatorial_masks(columns.P0, 6)
+        columns.combinatorial_tetrachords = combinatoriality.combinatorial_masks(columns.P0, 4)
+        columns.combinatorial_trichords = combinatoriality.combinatorial_masks(columns.P0, 3)
+        
+        return columns
+
+
+@dataclass
+class all_value_columns:
+    """
+    Columnar version of all_value_entry, where every field holds the
+    values of many rows.
+    """
+    row_number: np.ndarray = None
+    #prime transformations (uint8, N * 12)
+    P0: np.ndarray = None
+    R0: np.ndarray = None
+    I0: np.ndarray = None
+    RI0: np.ndarray = None
+    #interval sizes of prime transformations (int8, N * 11)
+    P0_intervals: np.ndarray = None
+    R0_intervals: np.ndarray = None
+    I0_intervals: np.ndarray = None
+    RI0_intervals: np.ndarray = None
+    #combinatorials (uint64 bitmasks, N)
+    combinatorial_hexachords: np.ndarray = None
+    combinatorial_tetrachords: np.ndarray = None
+    combinatorial_trichords: np.ndarray = None
+    
+    def as_dict(self) -> dict:
+        """
+        Returns {field name : array} without copying the arrays
+        """
+        return {field.name: getattr(self, field.name) for field in fields(self)}
         
 
 
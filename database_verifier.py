@@ -0,0 +1,226 @@
+import ast
+import csv
+import os
+import sqlite3
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from combinatoriality import combinatoriality
+from database_entry_creator import permutation_calculator, create_database_entry
+from twelvetone_database_creator import tone_row_permutations
+"""
+Verifies a database created by twelvetone_database_creator without loading it into memory.
+
+Two checks are made while streaming through the all_values table:
+- coverage: every row number in [0, expected_rows) must be stored exactly once
+  (the row number of a stored row is calculated from its prime row)
+- values: the values of all_values_entry() are recomputed for a random sample of the stored rows
+  (or all of them) and compared with the stored values.
+  Rows are recomputed in batches(see create_database_entry.row_values_columns()) and
+  combinatorials are compared regardless of their order.
+
+Every problem is written to a CSV report with the columns:
+issue, row_number, column, stored, recomputed
+"""
+@dataclass
+class verification_summary:
+    rows_read: int = 0
+    rows_recomputed: int = 0
+    missing_rows: int = 0
+    duplicate_rows: int = 0
+    out_of_range_rows: int = 0
+    unreadable_rows: int = 0
+    mismatched_rows: int = 0
+    report_path: str = None
+
+    @property
+    def passed(self) -> bool:
+        return (self.missing_rows + self.duplicate_rows + self.out_of_range_rows + self.unreadable_rows + self.mismatched_rows) == 0
+
+
+class database_verifier():
+
+    @classmethod
+    def verify_database(cls, database_name: str, report_path: str, expected_rows = None, sample_fraction = 1.0, seed = None, workers = None, batch_size = 10_000, max_reported_missing = 10_000) -> verification_summary:
+        """
+        Checks the coverage of a database and compares a random sample of its rows
+        with recomputed values. Problems are written to a CSV report at report_path.\n
+
+        Args:
+            expected_rows (int): number of rows the database should contain(row numbers 0 to expected_rows - 1).
+                Defaults to the number of rows in the table.
+            sample_fraction (float): fraction of rows to recompute, 1.0 recomputes every row and 0 only checks coverage
+            seed (int): seed of the random sample
+            workers (int): number of worker processes that recompute rows, 0 recomputes rows in the current process.
+                Defaults to the number of CPUs.
+            batch_size (int): number of rows fetched from the database(and sent to a worker) at once
+            max_reported_missing (int): missing row numbers beyond this number are counted, but not written to the report
+        """
+        if os.path.exists(database_name) == False:
+            raise ValueError(f"Specified database('{database_name}')\n does not exist")
+        if sample_fraction < 0 or sample_fraction > 1:
+            raise ValueError(f"Invalid sample fraction({sample_fraction}), sample fraction must be between 0 and 1")
+        if workers is None:
+            workers = os.cpu_count()
+
+        summary = verification_summary(report_path=report_path)
+        random_generator = np.random.default_rng(seed)
+        connection = sqlite3.connect(database_name)
+        if expected_rows is None:
+            expected_rows = connection.execute("SELECT COUNT(*) FROM all_values").fetchone()[0]
+        #one bit per expected row number
+        seen_rows = np.zeros((expected_rows + 7) // 8, dtype=np.uint8)
+
+        cursor = connection.execute(f"SELECT {', '.join(tone_row_permutations.database_columns())} FROM all_values")
+        with open(report_path, "w", newline="") as report_file:
+            report = csv.writer(report_file)
+            report.writerow(["issue", "row_number", "column", "stored", "recomputed"])
+            executor = ProcessPoolExecutor(workers) if workers > 0 else None
+            pending_batches = deque()
+            try:
+                while True:
+                    stored_rows = cursor.fetchmany(batch_size)
+                    if len(stored_rows) == 0:
+                        break
+                    summary.rows_read += len(stored_rows)
+                    row_numbers = cls.check_coverage(stored_rows, seen_rows, expected_rows, report, summary)
+
+                    sampled = (row_numbers >= 0) & (random_generator.random(len(stored_rows)) < sample_fraction)
+                    sample = [(int(row_numbers[i]), stored_rows[i]) for i in np.flatnonzero(sampled)]
+                    if len(sample) == 0:
+                        continue
+                    summary.rows_recomputed += len(sample)
+                    if executor is None:
+                        cls.write_mismatches(cls.find_mismatches(sample), report, summary)
+                        continue
+                    #limits the number of batches held in memory
+                    pending_batches.append(executor.submit(cls.find_mismatches, sample))
+                    if len(pending_batches) > 2 * workers:
+                        cls.write_mismatches(pending_batches.popleft().result(), report, summary)
+
+                while pending_batches:
+                    cls.write_mismatches(pending_batches.popleft().result(), report, summary)
+            finally:
+                if executor is not None:
+                    executor.shutdown(cancel_futures=True)
+                connection.close()
+
+            cls.write_missing_rows(seen_rows, expected_rows, report, summary, max_reported_missing)
+
+        return summary
+
+    @classmethod
+    def check_coverage(cls, stored_rows: list, seen_rows: np.ndarray, expected_rows: int, report, summary: verification_summary) -> np.ndarray:
+        """
+        Marks the row numbers of a batch of stored rows in seen_rows and reports
+        unreadable, out of range and duplicate rows.\n
+
+        Returns the row number of every stored row(-1 for rows that should not be recomputed).
+        """
+        row_numbers = np.full(len(stored_rows), -1, dtype=np.int64)
+        prime_rows = np.zeros((len(stored_rows), 12), dtype=np.int64)
+        readable = np.zeros(len(stored_rows), dtype=bool)
+        for i, stored_row in enumerate(stored_rows):
+            prime_row = cls.read_array(stored_row[0])
+            if prime_row is not None and len(prime_row) == 12 and np.array_equal(np.sort(prime_row), np.arange(12)):
+                prime_rows[i] = prime_row
+                readable[i] = True
+            else:
+                summary.unreadable_rows += 1
+                report.writerow(["unreadable", "", "prime_row", stored_row[0], ""])
+        row_numbers[readable] = permutation_calculator.find_row_numbers(prime_rows[readable])
+
+        out_of_range = readable & (row_numbers >= expected_rows)
+        for i in np.flatnonzero(out_of_range):
+            summary.out_of_range_rows += 1
+            report.writerow(["out_of_range", row_numbers[i], "prime_row", stored_rows[i][0], ""])
+
+        in_range = np.flatnonzero(readable & ~out_of_range)
+        candidate_numbers = row_numbers[in_range]
+        already_seen = (seen_rows[candidate_numbers >> 3] >> (candidate_numbers & 7).astype(np.uint8)) & 1
+        _, first_positions = np.unique(candidate_numbers, return_index=True)
+        repeated_in_batch = np.ones(len(candidate_numbers), dtype=bool)
+        repeated_in_batch[first_positions] = False
+        duplicates = (already_seen == 1) | repeated_in_batch
+        for i in in_range[duplicates]:
+            summary.duplicate_rows += 1
+            report.writerow(["duplicate", row_numbers[i], "prime_row", stored_rows[i][0], ""])
+        np.bitwise_or.at(seen_rows, candidate_numbers >> 3, np.left_shift(1, candidate_numbers & 7).astype(np.uint8))
+
+        #duplicates are only recomputed once
+        row_numbers[in_range[duplicates]] = -1
+        row_numbers[out_of_range] = -1
+        return row_numbers
+
+    @classmethod
+    def find_mismatches(cls, sample: list) -> list:
+        """
+        Recomputes the values of all_values_entry() for every (row_number, stored_row) pair.\n
+        
+        Returns a list of (row_number, column, stored, recomputed) for every stored value
+        that differs from its recomputed value.
+        """
+        mismatches = []
+        database_columns = tone_row_permutations.database_columns()
+        recomputed_columns = create_database_entry.row_values_columns([row_number for row_number, _ in sample]).as_dict()
+        #recomputed values in the order of the database columns
+        recomputed_columns = [recomputed_columns[name] for name in ["P0", "R0", "I0", "RI0",
+                                                                    "P0_intervals", "R0_intervals", "I0_intervals", "RI0_intervals",
+                                                                    "combinatorial_hexachords", "combinatorial_tetrachords", "combinatorial_trichords"]]
+        for i, (row_number, stored_row) in enumerate(sample):
+            for column, stored, recomputed_column in zip(database_columns, stored_row, recomputed_columns):
+                if column.startswith("combinatorial"):
+                    recomputed = tuple(combinatoriality.mask_to_transformations(recomputed_column[i]))
+                    matches = cls.read_value(stored) is not None and set(cls.read_value(stored)) == set(recomputed)
+                else:
+                    recomputed = recomputed_column[i].astype(int)
+                    matches = cls.read_value(stored) == recomputed.tolist()
+                if matches == False:
+                    mismatches.append((row_number, column, stored, str(recomputed)))
+        return mismatches
+    
+    @classmethod
+    def write_mismatches(cls, mismatches: list, report, summary: verification_summary):
+        summary.mismatched_rows += len({row_number for row_number, *_ in mismatches})
+        for mismatch in mismatches:
+            report.writerow(["mismatch", *mismatch])
+
+    @classmethod
+    def write_missing_rows(cls, seen_rows: np.ndarray, expected_rows: int, report, summary: verification_summary, max_reported_missing: int, block_size = 1 << 20):
+        """
+        Reports every row number in [0, expected_rows) that was not marked in seen_rows.
+        """
+        for block_start in range(0, len(seen_rows), block_size):
+            seen = np.unpackbits(seen_rows[block_start:block_start + block_size], bitorder="little").astype(bool)
+            missing = np.flatnonzero(~seen) + block_start * 8
+            missing = missing[missing < expected_rows]
+            for row_number in missing[:max(max_reported_missing - summary.missing_rows, 0)]:
+                report.writerow(["missing", row_number, "", "", ""])
+            summary.missing_rows += len(missing)
+
+    @classmethod
+    def read_array(cls, stored_value: str):
+        """
+        Returns a stored numpy array(e.g. '[ 0  1  2]') as a list of ints,
+        or None if the value cannot be read.
+        """
+        try:
+            return [int(value) for value in stored_value.strip().strip("[]").split()]
+        except (ValueError, AttributeError):
+            return None
+
+    @classmethod
+    def read_value(cls, stored_value: str):
+        """
+        Returns a stored value in a form that does not depend on how it was printed,
+        so that values written by different numpy versions can be compared.
+        """
+        if stored_value is None:
+            return None
+        if stored_value.startswith("("):
+            try:
+                return tuple(ast.literal_eval(stored_value))
+            except (ValueError, SyntaxError, TypeError):
+                return None
+        return cls.read_array(stored_value)
@@ -0,0 +1,96 @@
+import numpy as np
+from tone_row import tone_row
+"""
+Position lookups of tone row forms: positions[..., note] is the index of note in the form,
+i.e. the inverse permutation of the form.
+
+With the positions of all 48 forms of a row(or of N rows at once), questions such as "where is note 7 in every form"
+or "which forms contain the dyad (3, 9) at adjacent positions" are gathers of a few positions per form instead
+of searches through every form.
+
+Example(forms of a row that contain 3 directly followed by 9):
+    positions = form_positions.all_form_positions(prime_row)
+    matches = form_positions.contains_ordered_segment(positions, [3, 9])
+    np.array(tone_row.transformation_names())[matches]
+"""
+class form_positions():
+
+    @classmethod
+    def positions(cls, forms: np.ndarray) -> np.ndarray:
+        """
+        Returns the position of every note(0-11) in one or more forms as uint8, with the shape of forms
+        """
+        forms = np.asarray(forms)
+        positions = np.empty(forms.shape, dtype=np.uint8)
+        np.put_along_axis(positions, forms.astype(np.intp), np.broadcast_to(np.arange(12, dtype=np.uint8), forms.shape), axis=-1)
+        return positions
+
+    @classmethod
+    def all_form_positions(cls, prime_rows: np.ndarray) -> np.ndarray:
+        """
+        Returns the positions of all 48 forms of a tone row, (12,) -> (48, 12) and (N, 12) -> (N, 48, 12),
+        ordered as in tone_row.transformation_names()
+        """
+        return cls.positions(tone_row.all_transformations(prime_rows))
+
+    @classmethod
+    def segment_positions(cls, positions: np.ndarray, notes) -> np.ndarray:
+        """
+        Returns the positions of notes in every form, positions.shape[:-1] + (len(notes),)
+        """
+        return np.asarray(positions)[..., np.asarray(notes, dtype=np.intp)]
+
+    @classmethod
+    def contains_ordered_segment(cls, positions: np.ndarray, notes, adjacent = True) -> np.ndarray:
+        """
+        Returns True for every form that contains notes in this order,
+        directly after one another(adjacent = True) or with any notes between them(adjacent = False)
+        """
+        steps = np.diff(cls.segment_positions(positions, notes).astype(np.int8), axis=-1)
+        return (steps == 1).all(axis=-1) if adjacent else (steps > 0).all(axis=-1)
+
+    @classmethod
+    def contains_unordered_segment(cls, positions: np.ndarray, notes, start = None) -> np.ndarray:
+        """
+        Returns True for every form that holds notes next to each other in any order,
+        at the positions start to start + len(notes) - 1 if start is not None
+        """
+        segment_positions = cls.segment_positions(positions, notes)
+        first_positions = segment_positions.min(axis=-1)
+        matches = segment_positions.max(axis=-1) - first_positions == len(notes) - 1
+        if start is not None:
+            matches &= first_positions == start
+        return matches
+
+    @classmethod
+    def contains_dyad(cls, positions: np.ndarray, first_note: int, second_note: int, ordered = True) -> np.ndarray:
+        """
+        Returns True for every form where second_note directly follows first_note
+        (or directly precedes it, with ordered = False)
+        """
+        positions = np.asarray(positions)
+        steps = positions[..., second_note].astype(np.int8) - positions[..., first_note].astype(np.int8)
+        return (steps == 1) if ordered else (np.abs(steps) == 1)
+
+    @classmethod
+    def adjacency_matrices(cls, positions: np.ndarray) -> np.ndarray:
+        """
+        Returns positions.shape[:-1] + (12, 12) bool matrices where [first_note, second_note] is True
+        if second_note directly follows first_note in the form
+        """
+        positions = np.asarray(positions).astype(np.int8)
+        return positions[..., None, :] - positions[..., :, None] == 1
+
+    @classmethod
+    def shared_dyad_counts(cls, forms: np.ndarray, reference_positions: np.ndarray) -> np.ndarray:
+        """
+        Returns how many of the 11 ordered adjacent dyads of every form also appear in a reference form
+        (e.g. the positions of P0), forms.shape[:-1]
+        """
+        forms = np.asarray(forms, dtype=np.intp)
+        reference_positions = np.asarray(reference_positions).astype(np.int8)
+        if reference_positions.ndim > 1:
+            #one reference per row: (N, 12) references for (N, F, 12) forms
+            reference_positions = reference_positions[..., None, :]
+        note_positions = np.take_along_axis(np.broadcast_to(reference_positions, forms.shape), forms, axis=-1)
+        return (np.diff(note_positions, axis=-1) == 1).sum(axis=-1, dtype=np.uint8)
@@ -0,0 +1,103 @@
+import numpy as np
+from dataclasses import dataclass
+"""
+Interval statistics of millions of tone rows at a time.
+
+Every function takes a (12,) tone row or an (N, 12) array of tone rows and works on all rows at once,
+with compact results(uint8/int8 per interval, one bool per row).
+
+Intervals are measured in ascending semitones(0-11) from every note to the next one, so that a row
+and all of its transpositions have the same intervals. Interval classes(1-6) are the smaller of an interval
+and its complement, i.e. they do not depend on direction.
+
+Example:
+    analysis = interval_analytics.analyze(tone_rows)
+    all_interval_rows = tone_rows[analysis.all_interval]
+"""
+@dataclass
+class interval_analysis:
+    intervals: np.ndarray #(N, 11) uint8 ascending intervals(0-11)
+    interval_class_counts: np.ndarray #(N, 6) uint8 number of intervals of every interval class(1-6)
+    all_interval: np.ndarray #(N,) bool, every interval(1-11) appears once
+    palindromic: np.ndarray #(N,) bool, the intervals read the same backwards(RI is a transposition of the row)
+    retrograde_symmetric: np.ndarray #(N,) bool, the retrograde is a transposition of the row
+
+
+class interval_analytics():
+
+    @classmethod
+    def analyze(cls, tone_rows: np.ndarray) -> interval_analysis:
+        """
+        Returns every interval statistic of the tone rows, calculating their intervals only once
+        """
+        intervals = cls.interval_sequences(tone_rows)
+        return interval_analysis(intervals,
+                                 cls.interval_class_counts(intervals, intervals=True),
+                                 cls.is_all_interval(intervals, intervals=True),
+                                 cls.is_palindromic(intervals, intervals=True),
+                                 cls.is_retrograde_symmetric(intervals, intervals=True))
+
+    @classmethod
+    def interval_sequences(cls, tone_rows: np.ndarray) -> np.ndarray:
+        """
+        Returns the ascending intervals(0-11) between neighbouring notes as uint8, (N, 12) -> (N, 11)
+        """
+        tone_rows = np.asarray(tone_rows).astype(np.uint8, copy=False)
+        #adding 12 first keeps the uint8 difference positive
+        return (tone_rows[..., 1:] + np.uint8(12) - tone_rows[..., :-1]) % np.uint8(12)
+
+    @classmethod
+    def directed_intervals(cls, tone_rows: np.ndarray) -> np.ndarray:
+        """
+        Returns the shortest signed intervals(-5 to 6) between neighbouring notes as int8,
+        the same values as tone_row.row_interval_sizes()
+        """
+        return (cls.interval_sequences(tone_rows).astype(np.int8) + np.int8(5)) % np.int8(12) - np.int8(5)
+
+    @classmethod
+    def interval_classes(cls, tone_rows: np.ndarray, intervals = False) -> np.ndarray:
+        """
+        Returns the interval class(1-6) of every interval as uint8, (N, 12) -> (N, 11).
+        With intervals = True, tone_rows already holds interval_sequences().
+        """
+        interval_sequences = np.asarray(tone_rows) if intervals else cls.interval_sequences(tone_rows)
+        return np.minimum(interval_sequences, np.uint8(12) - interval_sequences)
+
+    @classmethod
+    def interval_class_counts(cls, tone_rows: np.ndarray, intervals = False) -> np.ndarray:
+        """
+        Returns how many intervals of every interval class(1-6) each row has as uint8, (N, 12) -> (N, 6)
+        """
+        interval_classes = cls.interval_classes(tone_rows, intervals)
+        rows = interval_classes.reshape(-1, 11)
+        #one bincount for all rows, every row counts into its own 6 bins
+        bins = rows.astype(np.intp) - 1 + 6 * np.arange(len(rows), dtype=np.intp)[:, None]
+        counts = np.bincount(bins.ravel(), minlength=6 * len(rows)).astype(np.uint8)
+        return counts.reshape(interval_classes.shape[:-1] + (6,))
+
+    @classmethod
+    def is_all_interval(cls, tone_rows: np.ndarray, intervals = False) -> np.ndarray:
+        """
+        Returns True for every all-interval row(each interval 1-11 appears once)
+        """
+        interval_sequences = np.asarray(tone_rows) if intervals else cls.interval_sequences(tone_rows)
+        interval_bits = np.left_shift(np.uint16(1), interval_sequences.astype(np.uint16))
+        return np.bitwise_or.reduce(interval_bits, axis=-1) == 0xFFE
+
+    @classmethod
+    def is_palindromic(cls, tone_rows: np.ndarray, intervals = False) -> np.ndarray:
+        """
+        Returns True for every row whose intervals read the same backwards,
+        i.e. its retrograde inversion is one of its transpositions
+        """
+        interval_sequences = np.asarray(tone_rows) if intervals else cls.interval_sequences(tone_rows)
+        return (interval_sequences == interval_sequences[..., ::-1]).all(axis=-1)
+
+    @classmethod
+    def is_retrograde_symmetric(cls, tone_rows: np.ndarray, intervals = False) -> np.ndarray:
+        """
+        Returns True for every row whose retrograde is one of its transpositions(always the tritone transposition),
+        i.e. its intervals read backwards are its inverted intervals
+        """
+        interval_sequences = np.asarray(tone_rows) if intervals else cls.interval_sequences(tone_rows)
+        return ((interval_sequences + interval_sequences[..., ::-1]) % np.uint8(12) == 0).all(axis=-1)
@@ -1,3 +1,4 @@
+import numpy as np
 from note_names import note_names
 class intervals(): 
     """
@@ -28,6 +29,9 @@ class intervals():
         AAAA = quadruple-augmented
         dddd = quadruple-diminished
     """
+    _interval_name_table = None
+    _transposed_note_table = None
+    
     @classmethod
     @property
     def first_interval_sizes(cls):
@@ -124,6 +128,18 @@ class intervals():
         practically unheard of in 12-tone composition, as it would make the music extremely challenging to read
         and serves no practical purpose in visually demonstrating transformations of tone rows.
         """
+        interval_name = cls.interval_name_table().get((starting_note, direction, final_note))
+        if interval_name is None:
+            #raises the same errors as before the table was introduced
+            return cls.calculate_note_interval_name(starting_note, direction, final_note)
+        return interval_name
+    
+    @classmethod
+    def calculate_note_interval_name(cls, starting_note: str, direction: str, final_note: str):
+        """
+        Calculates the interval name between two notes(see note_interval_name(), which looks the name up
+        in interval_name_table())
+        """
         if starting_note[0].isupper == False:
             raise ValueError(f"Starting note '{starting_note[0]}' should be written in uppercase")
         if final_note[0].isupper == False:
@@ -184,8 +200,67 @@ class intervals():
         ddd = triple-diminished
         AAAA = quadruple-augmented
         dddd = quadruple-diminished
+        
+        Returns None if no note is found. If several notes are found, the first one in
+        note_names.note_to_number_relations is returned.
+        """
+        transposed_note = cls.transposed_note_table().get((starting_note, interval_name, direction))
+        if transposed_note is None and (direction not in {"up", "down"} or starting_note not in note_names.note_to_number_relations):
+            #raises the same errors as before the table was introduced
+            cls.calculate_note_interval_name(starting_note, direction, "C")
+        return transposed_note
+    
+    @classmethod
+    def note_interval_names(cls, starting_notes, direction, final_notes) -> np.ndarray:
+        """
+        Returns the interval name between every pair of notes(see note_interval_name()), or None where a pair has no interval name.
+        starting_notes, direction and final_notes are note names/directions or arrays of them that broadcast together.
+        """
+        interval_name_table = cls.interval_name_table()
+        starting_notes, directions, final_notes = np.broadcast_arrays(np.asarray(starting_notes, dtype=object), np.asarray(direction, dtype=object), np.asarray(final_notes, dtype=object))
+        interval_names = [interval_name_table.get(key) for key in zip(starting_notes.ravel(), directions.ravel(), final_notes.ravel())]
+        return np.array(interval_names, dtype=object).reshape(starting_notes.shape)
+    
+    @classmethod
+    def get_transposed_notes(cls, starting_notes, interval_names, direction) -> np.ndarray:
+        """
+        Returns the transposed note of every note(see get_transposed_note()), or None where no note is found.
+        starting_notes, interval_names and direction are names/directions or arrays of them that broadcast together.
+        """
+        transposed_note_table = cls.transposed_note_table()
+        starting_notes, interval_names, directions = np.broadcast_arrays(np.asarray(starting_notes, dtype=object), np.asarray(interval_names, dtype=object), np.asarray(direction, dtype=object))
+        transposed_notes = [transposed_note_table.get(key) for key in zip(starting_notes.ravel(), interval_names.ravel(), directions.ravel())]
+        return np.array(transposed_notes, dtype=object).reshape(starting_notes.shape)
+    
+    @classmethod
+    def interval_name_table(cls) -> dict:
         """
+        {(starting note, direction, final note) : interval name} for every pair of notes in
+        note_names.note_to_number_relations that has an interval name. Created on first use.
+        """
+        if cls._interval_name_table is None:
+            interval_name_table = {}
+            for starting_note in note_names.note_to_number_relations:
+                for direction in ("up", "down"):
+                    for final_note in note_names.note_to_number_relations:
+                        try:
+                            interval_name_table[starting_note, direction, final_note] = cls.calculate_note_interval_name(starting_note, direction, final_note)
+                        except KeyError:
+                            pass
+            cls._interval_name_table = interval_name_table
+        return cls._interval_name_table
+    
+    @classmethod
+    def transposed_note_table(cls) -> dict:
+        """
+        {(starting note, interval name, direction) : transposed note}. Created on first use.\n
         
-        for key in note_names.note_to_number_relations.keys():
-            if cls.note_interval_name(starting_note, direction, key) == interval_name:
-                return key
\ No newline at end of file
+        Where several notes are the same interval away from a starting note, the first one
+        in note_names.note_to_number_relations is used.
+        """
+        if cls._transposed_note_table is None:
+            transposed_note_table = {}
+            for (starting_note, direction, final_note), interval_name in cls.interval_name_table().items():
+                transposed_note_table.setdefault((starting_note, interval_name, direction), final_note)
+            cls._transposed_note_table = transposed_note_table
+        return cls._transposed_note_table
\ No newline at end of file
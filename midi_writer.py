@@ -0,0 +1,142 @@
+import os
+import struct
+import numpy as np
+from tone_row import tone_row
+"""
+Writes standard MIDI files(format 1) of tone row forms directly from note numbers.
+
+Every form(e.g. the 4 prime transformations of tone_row.prime_transformations_list() or
+the 48 forms of tone_row.all_transformations()) is written to its own track. The first track
+of every file only holds the tempo.
+
+Example(all 48 forms of a row, one quarter note per note, starting on middle C's octave):
+    midi_writer.write_midi(tone_row.all_transformations(prime_row), "row.mid", octave=4)
+"""
+class midi_writer():
+
+    ticks_per_quarter = 480
+
+    @classmethod
+    def midi_bytes(cls, forms: np.ndarray, octave = 4, durations = 480, velocity = 80, tempo = 120, channel = 0, track_names = None, sequential = False) -> bytes:
+        """
+        Returns the contents of a MIDI file with one track per form.\n
+
+        Args:
+            forms: (12,) or (F, 12) array of note numbers(0-11)
+            octave: octave of every note(4 places note 0 on middle C). Either an int or an array that
+                broadcasts to the shape of forms, e.g. midi_writer.treble_clef_octaves(forms)
+            durations: length of every note in ticks(480 ticks per quarter note), an int or an array
+                that broadcasts to the shape of forms
+            velocity (int): velocity of every note
+            tempo (float): quarter notes per minute
+            channel (int): MIDI channel(0-15) of every track
+            track_names (list): name of every track, defaults to the transformation names
+                of 4 or 48 forms(see tone_row.transformation_names()) and "Form 1", "Form 2", ... otherwise
+            sequential (bool): start every track after the previous one instead of playing all forms at once
+        """
+        forms = np.asarray(forms).reshape(-1, 12)
+        octave = np.asarray(octave, dtype=np.int64)
+        #notes 0-11 stay between MIDI note 0 and 127 in octaves -1 to 9
+        if octave.min() < -1 or octave.max() > 9:
+            raise ValueError("Every octave must be between -1 and 9")
+        pitches = np.broadcast_to(forms.astype(np.int64) + 12 * (octave + 1), forms.shape)
+        durations = np.broadcast_to(np.asarray(durations, dtype=np.int64), forms.shape)
+        if pitches.min() < 0 or pitches.max() > 127:
+            raise ValueError("Every note must be between MIDI note 0 and 127, choose a different octave")
+        if durations.min() <= 0:
+            raise ValueError("Every duration must be at least one tick")
+        if velocity < 0 or velocity > 127:
+            raise ValueError(f"Invalid velocity({velocity}), velocity must be between 0 and 127")
+        if channel < 0 or channel > 15:
+            raise ValueError(f"Invalid MIDI channel({channel}), channel must be between 0 and 15")
+        if track_names is None:
+            track_names = cls.default_track_names(len(forms))
+        if len(track_names) != len(forms):
+            raise ValueError(f"Invalid number of track names({len(track_names)}), every one of the {len(forms)} forms needs a track name")
+
+        tracks = [cls.tempo_track(tempo)]
+        track_start = 0
+        for pitch_row, duration_row, track_name in zip(pitches.tolist(), durations.tolist(), track_names):
+            tracks.append(cls.form_track(pitch_row, duration_row, track_name, velocity, channel, track_start if sequential else 0))
+            track_start += sum(duration_row)
+
+        header = b"MThd" + struct.pack(">IHHH", 6, 1, len(tracks), cls.ticks_per_quarter)
+        return header + b"".join(b"MTrk" + struct.pack(">I", len(track)) + track for track in tracks)
+
+    @classmethod
+    def write_midi(cls, forms: np.ndarray, output, **options):
+        """
+        Writes a MIDI file(see midi_bytes() for options) to a file path or a file-like object opened in binary mode
+        """
+        contents = cls.midi_bytes(forms, **options)
+        if isinstance(output, (str, os.PathLike)):
+            with open(output, "wb") as midi_file:
+                midi_file.write(contents)
+        else:
+            output.write(contents)
+
+    @classmethod
+    def write_midi_files(cls, form_batches, file_paths, **options) -> int:
+        """
+        Writes a MIDI file for every (F, 12) array of forms in form_batches(e.g. an (N, 48, 12) array)
+        to the file path at the same position in file_paths. Returns the number of files written.
+        """
+        file_count = 0
+        for forms, file_path in zip(form_batches, file_paths):
+            cls.write_midi(forms, file_path, **options)
+            file_count += 1
+        return file_count
+
+    @classmethod
+    def treble_clef_octaves(cls, forms: np.ndarray) -> np.ndarray:
+        """
+        Returns the octave of every note when it is placed between F4 and E5
+        (see note_names.number_to_sharp_treble_clef_positions)
+        """
+        return np.where(np.asarray(forms) < 5, 5, 4)
+
+    @classmethod
+    def default_track_names(cls, form_count: int) -> list:
+        if form_count == 48:
+            return tone_row.transformation_names()
+        if form_count == 4:
+            return ["P0", "R0", "I0", "RI0"]
+        return [f"Form {i + 1}" for i in range(form_count)]
+
+    @classmethod
+    def tempo_track(cls, tempo: float) -> bytes:
+        microseconds_per_quarter = round(60_000_000 / tempo)
+        return (b"\x00\xff\x51\x03" + microseconds_per_quarter.to_bytes(3, "big")
+                + b"\x00\xff\x58\x04\x0c\x02\x18\x08" #12/4 time signature
+                + b"\x00\xff\x2f\x00")
+
+    @classmethod
+    def form_track(cls, pitches: list, durations: list, track_name: str, velocity: int, channel: int, start = 0) -> bytes:
+        """
+        Returns the events of a track that plays pitches one after another
+        """
+        name = track_name.encode("utf-8")
+        events = [b"\x00\xff\x03", cls.variable_length(len(name)), name]
+        note_on = bytes([0x90 | channel])
+        note_off = bytes([0x80 | channel])
+        delta_time = start
+        for pitch, duration in zip(pitches, durations):
+            events += [cls.variable_length(delta_time), note_on, bytes((pitch, velocity)),
+                       cls.variable_length(duration), note_off, bytes((pitch, 0))]
+            delta_time = 0
+        events.append(b"\x00\xff\x2f\x00")
+        return b"".join(events)
+
+    @classmethod
+    def variable_length(cls, value: int) -> bytes:
+        """
+        Returns a MIDI variable-length quantity(7 bits per byte, most significant byte first)
+        """
+        if value < 0x80:
+            return bytes((value,))
+        encoded = [value & 0x7f]
+        value >>= 7
+        while value > 0:
+            encoded.append(0x80 | (value & 0x7f))
+            value >>= 7
+        return bytes(reversed(encoded))
@@ -0,0 +1,249 @@
+import datetime
+import io
+import os
+import uuid
+import numpy as np
+from combinatoriality import combinatoriality
+from note_names import note_names
+from tone_row import tone_row
+"""
+Writes the same MusicXML as music_xml_writer.create_twelve_tone_report_xml(...).write("musicxml")
+without building a music21 score.
+
+The document is assembled from precompiled text templates and written part by part,
+so only the part that is being written is held in memory. Apart from the part ids
+(random for every report, like music21's), the encoding date and the software name,
+the output is identical to music21's.
+"""
+class music_xml_template_writer():
+
+    software = "twelvetone music_xml_template_writer"
+    #music21 cycles the numbers of slurs through 1-6
+    max_slur_number = 6
+
+    header_template = (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<!DOCTYPE score-partwise  PUBLIC "-//Recordare//DTD MusicXML 4.0 Partwise//EN" "http://www.musicxml.org/dtds/partwise.dtd">\n'
+        '<score-partwise version="4.0">\n'
+        '  <work>\n'
+        '    <work-title>{title}</work-title>\n'
+        '  </work>\n'
+        '  <movement-title>{title}</movement-title>\n'
+        '  <identification>\n'
+        '    <creator type="composer" />\n'
+        '    <encoding>\n'
+        '      <encoding-date>{date}</encoding-date>\n'
+        '      <software>{software}</software>\n'
+        '      <supports element="beam" type="yes" />\n'
+        '      <supports element="stem" type="yes" />\n'
+        '      <supports element="accidental" type="yes" />\n'
+        '    </encoding>\n'
+        '  </identification>\n'
+        '  <defaults>\n'
+        '    <scaling>\n'
+        '      <millimeters>7</millimeters>\n'
+        '      <tenths>40</tenths>\n'
+        '    </scaling>\n'
+        '  </defaults>\n'
+        '  <part-list>\n'
+    )
+    score_part_template = (
+        '    <score-part id="{part_id}">\n'
+        '      <part-name>{part_name}</part-name>\n'
+        '    </score-part>\n'
+    )
+    part_list_end = '  </part-list>\n'
+    part_start_template = (
+        '  <!--{part_divider}-->\n'
+        '  <part id="{part_id}">\n'
+        '    <!--========================= Measure 0 ==========================-->\n'
+        '    <measure implicit="no" number="0">\n'
+        '      <attributes>\n'
+        '        <divisions>10080</divisions>\n'
+        '        <time print-object="no">\n'
+        '          <beats>12</beats>\n'
+        '          <beat-type>4</beat-type>\n'
+        '        </time>\n'
+        '      </attributes>\n'
+    )
+    direction_template = (
+        '      <direction>\n'
+        '        <direction-type>\n'
+        '          <words>{words}</words>\n'
+        '        </direction-type>\n'
+        '      </direction>\n'
+    )
+    note_start_template = (
+        '      <note>\n'
+        '        <pitch>\n'
+        '          <step>{step}</step>\n'
+        '{alter}'
+        '          <octave>{octave}</octave>\n'
+        '        </pitch>\n'
+        '        <duration>10080</duration>\n'
+        '        <type>quarter</type>\n'
+        '{accidental}'
+        '        <stem>none</stem>\n'
+    )
+    slur_template = (
+        '        <notations>\n'
+        '          <slur number="{number}" type="{slur_type}" />\n'
+        '        </notations>\n'
+    )
+    note_end = '      </note>\n'
+    part_end = (
+        '    </measure>\n'
+        '  </part>\n'
+    )
+    document_end = '</score-partwise>'
+
+    #{segment size : text above a combinatorial part}
+    combinatorial_parts = {
+        6: "(hexachordal combinatorial)",
+        4: "(tetrachordal combinatorial)",
+        3: "(trichordal combinatorial)",
+    }
+
+    _note_templates = None
+
+    @classmethod
+    def write_twelvetone_report(cls, prime_row: np.ndarray, output, score_title = None, include_combinatorials = True):
+        """
+        Writes a .musicxml report(see music_xml_writer.write_twelvetone_report()) to output,
+        which is either a file path or a file-like object opened in text or binary mode.
+        """
+        if isinstance(output, (str, os.PathLike)):
+            with open(output, "w", encoding="utf-8") as xml_file:
+                cls.write_report_to(prime_row, xml_file, score_title, include_combinatorials)
+            return
+        if isinstance(output, (io.RawIOBase, io.BufferedIOBase)):
+            output = io.TextIOWrapper(output, encoding="utf-8", newline="")
+            try:
+                cls.write_report_to(prime_row, output, score_title, include_combinatorials)
+            finally:
+                output.detach()
+            return
+        cls.write_report_to(prime_row, output, score_title, include_combinatorials)
+
+    @classmethod
+    def create_twelve_tone_report_xml(cls, prime_row: np.ndarray, score_title = None, include_combinatorials = True) -> str:
+        """
+        Returns the .musicxml report as a string
+        """
+        xml_text = io.StringIO()
+        cls.write_report_to(prime_row, xml_text, score_title, include_combinatorials)
+        return xml_text.getvalue()
+
+    @classmethod
+    def write_report_to(cls, prime_row: np.ndarray, text_file, score_title = None, include_combinatorials = True):
+        """
+        Writes the report to a file-like object opened in text mode
+        """
+        if score_title is None:
+            score_title = "Analysis of a Twelve-tone Row"
+        parts = cls.report_parts(prime_row, include_combinatorials)
+        part_ids = cls.write_score_header(text_file, score_title, [part_name for part_name, _ in parts])
+
+        slur_count = 0
+        for part_number, (part_id, (part_name, segment_size)) in enumerate(zip(part_ids, parts), 1):
+            tone_row_notes = tone_row.get_transformation(prime_row, part_name)
+            slur_count = cls.write_part(text_file, part_number, part_id, tone_row_notes, segment_size, slur_count)
+        text_file.write(cls.document_end)
+
+    @classmethod
+    def write_score_header(cls, text_file, score_title: str, part_names) -> list:
+        """
+        Writes everything before the first part(including the part list)
+        and returns a new part id for every part name.
+        """
+        text_file.write(cls.header_template.format(title=cls.escape(score_title), date=datetime.date.today().isoformat(), software=cls.escape(cls.software)))
+        part_ids = []
+        for part_name in part_names:
+            part_ids.append("P" + uuid.uuid4().hex)
+            text_file.write(cls.score_part_template.format(part_id=part_ids[-1], part_name=cls.escape(part_name)))
+        text_file.write(cls.part_list_end)
+        return part_ids
+
+    @classmethod
+    def report_parts(cls, prime_row: np.ndarray, include_combinatorials = True) -> list:
+        """
+        Returns [(part name, segment size)] in the order of the parts of the report.
+        The segment size of the prime transformations is None.
+        """
+        parts = [(name, None) for name in ["P0", "R0", "I0", "RI0"]]
+        if include_combinatorials == False:
+            return parts
+        parts += [(name, 6) for name in combinatoriality.find_hexachordal_combinatorials(prime_row)]
+        parts += [(name, 4) for name in combinatoriality.find_tetrachordal_combinatorials(prime_row)]
+        parts += [(name, 3) for name in combinatoriality.find_trichordal_combinatorials(prime_row)]
+        return parts
+
+    @classmethod
+    def write_part(cls, text_file, part_number: int, part_id: str, tone_row_notes: np.ndarray, segment_size = None, slur_count = 0) -> int:
+        """
+        Writes a part with a single measure of twelve stemless quarter notes.
+        Combinatorial parts(segment_size is not None) get a text direction and
+        a slur over every segment.\n
+
+        Returns the number of slurs written in the score so far.
+        """
+        text_file.write(cls.part_start_template.format(part_divider=cls.divider_comment(f"Part {part_number}"), part_id=part_id))
+        if segment_size is not None:
+            text_file.write(cls.direction_template.format(words=cls.combinatorial_parts[segment_size]))
+
+        note_templates = cls.note_templates()
+        sharp_steps = set()
+        for position, note_number in enumerate(tone_row_notes):
+            note_number = int(note_number)
+            step = note_names.number_to_sharp_treble_clef_positions[note_number][0]
+            #naturals only get an accidental after a sharp of the same step in the measure
+            text_file.write(note_templates[note_number, step in sharp_steps])
+            if note_templates[note_number, True] is None:
+                sharp_steps.add(step)
+            if segment_size is not None and position % segment_size == 0:
+                slur_count += 1
+                text_file.write(cls.slur_template.format(number=(slur_count - 1) % cls.max_slur_number + 1, slur_type="start"))
+            elif segment_size is not None and position % segment_size == segment_size - 1:
+                text_file.write(cls.slur_template.format(number=(slur_count - 1) % cls.max_slur_number + 1, slur_type="stop"))
+            text_file.write(cls.note_end)
+        text_file.write(cls.part_end)
+        return slur_count
+
+    @classmethod
+    def note_templates(cls) -> dict:
+        """
+        {(note number, natural sign) : start of the <note> element}\n
+
+        Sharps have no natural sign version(value is None).
+        """
+        if cls._note_templates is None:
+            templates = {}
+            for note_number, note_name in note_names.number_to_sharp_treble_clef_positions.items():
+                step, octave = note_name[0], note_name[-1]
+                if "#" in note_name:
+                    templates[note_number, False] = cls.note_start_template.format(
+                        step=step, octave=octave,
+                        alter='          <alter>1</alter>\n', accidental='        <accidental>sharp</accidental>\n')
+                    templates[note_number, True] = None
+                else:
+                    templates[note_number, False] = cls.note_start_template.format(step=step, octave=octave, alter="", accidental="")
+                    templates[note_number, True] = cls.note_start_template.format(
+                        step=step, octave=octave,
+                        alter='          <alter>0</alter>\n', accidental='        <accidental>natural</accidental>\n')
+            cls._note_templates = templates
+        return cls._note_templates
+
+    @classmethod
+    def escape(cls, text: str) -> str:
+        """
+        Escapes '&', '<' and '>' in element text(xml.sax.saxutils imports urllib, which is slow to import)
+        """
+        return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+    @classmethod
+    def divider_comment(cls, comment: str) -> str:
+        """
+        Returns a comment centered between '=' signs, as written by music21
+        """
+        comment_length = min(len(comment), 60)
+        return "=" * ((60 - comment_length) // 2) + " " + comment + " " + "=" * (60 - comment_length - (60 - comment_length) // 2)
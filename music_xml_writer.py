@@ -1,14 +1,25 @@
-import music21
+import copy
 import os
 import numpy as np
 from combinatoriality import combinatoriality
+from music_xml_template_writer import music_xml_template_writer
 from note_names import note_names
 from tone_row import tone_row
 
+def _music21():
+    """
+    Returns the music21 module.
+    Importing music21 takes seconds, so it is only imported when a music21 score is created.
+    """
+    import music21
+    return music21
+
 class music_xml_writer():
     
+    _measure_template = None
+    
     @classmethod
-    def write_twelvetone_report(cls, prime_row: np.ndarray, file_name: str, directory = None, score_title = None, include_combinatorials = True):
+    def write_twelvetone_report(cls, prime_row: np.ndarray, file_name: str, directory = None, score_title = None, include_combinatorials = True, backend = "music21", verbose = True):
         """
         Creates a .musicxml file with parts in the following order:\n
         -P0\n
@@ -27,11 +38,21 @@ class music_xml_writer():
         If directory is not specified, file will be written in 'xml_files' subfolder in the project file.
         
         Warning: If a specific file path is given as a root directory, user might encounter permission errors.
+        
+        backend = "music21" builds a music21 score and writes it with music21.
+        backend = "template" writes the same MusicXML directly(see music_xml_template_writer), which is much faster.
+        verbose = False does not print a message once the file is written.
         """
+        if backend not in ("music21", "template"):
+            raise ValueError(f"Invalid backend('{backend}'), backend must be 'music21' or 'template'")
         file_path = cls.create_file_path(directory, file_name)
-        full_score = cls.create_twelve_tone_report_xml(prime_row, score_title)
-        full_score.write("musicxml", file_path)
-        print("\n=========================\nFile successfully written\n=========================")
+        if backend == "template":
+            music_xml_template_writer.write_twelvetone_report(prime_row, file_path, score_title, include_combinatorials)
+        else:
+            full_score = cls.create_twelve_tone_report_xml(prime_row, score_title, include_combinatorials)
+            full_score.write("musicxml", file_path)
+        if verbose:
+            print("\n=========================\nFile successfully written\n=========================")
     
     @classmethod
     def create_twelve_tone_report_xml(cls, prime_row: np.ndarray, score_title = None, include_combinatorials = True):
@@ -50,6 +71,7 @@ class music_xml_writer():
         Every part's tone row is written in quarter notes between the top and bottom line of
         the treble clef (between F4 and E5). All notes are written as naturals or sharps(excluding 'E#' and B#').
         """
+        music21 = _music21()
         if score_title is None:
             score_title = "Analysis of a Twelve-tone Row"
         prime_part_names = ["P0", "R0", "I0", "RI0"]
@@ -86,20 +108,57 @@ class music_xml_writer():
         Returns a music21 measure object.
         Part consists of twelve stemless quarter notes with a hidden 12/4
         time signature.
-        """
         
+        The time signature is a copy of the prototype in measure_template().
+        """
+        music21 = _music21()
+        pitch_names, time_signature = cls.measure_template()
         measure = music21.stream.Measure()
-        measure.timeSignature = music21.meter.TimeSignature('12/4')
-        measure.timeSignature.style.hideObjectOnPrint = True
+        measure.timeSignature = cls.clone_time_signature(time_signature)
         pr_part_note_numbers = tone_row.get_transformation(prime_row, transformation_name)
-        pr_part_notes = note_names.convert_numbers_to_note_names(pr_part_note_numbers, note_names.number_to_sharp_treble_clef_positions)
-        for pitch in pr_part_notes:
-            note = music21.note.Note(pitch)
+        for offset, note_number in enumerate(pr_part_note_numbers):
+            note = music21.note.Note(pitch_names[note_number])
             note.stemDirection = "noStem"
-            measure.append(note)
+            measure.coreInsert(float(offset), note)
+        measure.coreElementsChanged()
         
         return measure
     
+    @classmethod
+    def measure_template(cls):
+        """
+        Returns (pitch names(e.g. 'C#5') indexed by note number, hidden 12/4 time signature),
+        created once per process.\n
+        
+        The time signature is a prototype that is never inserted into a stream, measures get a copy of it
+        (see clone_time_signature()). Notes are created from their names, because a copy of a note needs
+        its own pitch and duration, which takes longer than parsing the name.
+        """
+        if cls._measure_template is None:
+            music21 = _music21()
+            pitch_names = tuple(note_names.number_to_sharp_treble_clef_positions[note_number] for note_number in range(12))
+            time_signature = music21.meter.TimeSignature("12/4")
+            time_signature.style.hideObjectOnPrint = True
+            cls._measure_template = (pitch_names, time_signature)
+        return cls._measure_template
+    
+    @classmethod
+    def clone_time_signature(cls, prototype):
+        """
+        Returns a shallow copy of a music21 time signature with its own sites, style, groups and cache.\n
+        
+        music21 objects keep a registry of every stream they are inserted into(their sites), so a shared
+        time signature would keep every score alive. Building the meter sequences takes most of the time
+        of a 12/4 time signature, so the copy shares them with the prototype, they are only read when a score is written.
+        """
+        music21 = _music21()
+        time_signature = copy.copy(prototype)
+        time_signature.sites = music21.sites.Sites()
+        time_signature.groups = copy.copy(prototype.groups)
+        time_signature.style = copy.copy(prototype.style)
+        time_signature.clearCache()
+        return time_signature
+    
     @classmethod
     def create_prime_transformation_part(cls, prime_transformation_name: str, prime_row: np.ndarray):
         """
@@ -107,6 +166,7 @@ class music_xml_writer():
         Part consists of twelve stemless quarter notes with a hidden 12/4
         time signature.
         """
+        music21 = _music21()
         measure = cls.create_stemless_measure(prime_transformation_name, prime_row)
         prime_row_part = music21.stream.Part()
         prime_row_part.partName = prime_transformation_name
@@ -124,12 +184,14 @@ class music_xml_writer():
         Dotted ties are added over each half of the tone row.
         Text is added above the part which indicates that it is a hexachordal combinatorial.
         """
+        music21 = _music21()
         measure = cls.create_stemless_measure(transformation_name, prime_row)
+        notes = list(measure.notes)
         comment = music21.expressions.TextExpression("(hexachordal combinatorial)")
         measure.insert(0, comment)
-        first_slur = music21.spanner.Slur([measure.notes[0],  measure.notes[5]])
+        first_slur = music21.spanner.Slur([notes[0],  notes[5]])
         measure.insert(0.0, first_slur)
-        second_slur = music21.spanner.Slur([measure.notes[6],  measure.notes[11]])
+        second_slur = music21.spanner.Slur([notes[6],  notes[11]])
         measure.insert(0.0, second_slur)
         hex_row_part = music21.stream.Part()
         hex_row_part.partName = transformation_name
@@ -147,14 +209,16 @@ class music_xml_writer():
         Dotted ties are added over each half of the tone row.
         Text is added above the part which indicates that it is a hexachordal combinatorial.
         """
+        music21 = _music21()
         measure = cls.create_stemless_measure(transformation_name, prime_row)
+        notes = list(measure.notes)
         comment = music21.expressions.TextExpression("(tetrachordal combinatorial)")
         measure.insert(0, comment)
-        first_slur = music21.spanner.Slur([measure.notes[0],  measure.notes[3]])
+        first_slur = music21.spanner.Slur([notes[0],  notes[3]])
         measure.insert(0.0, first_slur)
-        second_slur = music21.spanner.Slur([measure.notes[4],  measure.notes[7]])
+        second_slur = music21.spanner.Slur([notes[4],  notes[7]])
         measure.insert(0.0, second_slur)
-        third_slur = music21.spanner.Slur([measure.notes[8],  measure.notes[11]])
+        third_slur = music21.spanner.Slur([notes[8],  notes[11]])
         measure.insert(0.0, third_slur)
         tetra_row_part = music21.stream.Part()
         tetra_row_part.partName = transformation_name
@@ -172,16 +236,18 @@ class music_xml_writer():
         Dotted ties are added over each half of the tone row.
         Text is added above the part which indicates that it is a hexachordal combinatorial.
         """
+        music21 = _music21()
         measure = cls.create_stemless_measure(transformation_name, prime_row)
+        notes = list(measure.notes)
         comment = music21.expressions.TextExpression("(trichordal combinatorial)")
         measure.insert(0, comment)
-        first_slur = music21.spanner.Slur([measure.notes[0],  measure.notes[2]])
+        first_slur = music21.spanner.Slur([notes[0],  notes[2]])
         measure.insert(0.0, first_slur)
-        second_slur = music21.spanner.Slur([measure.notes[3],  measure.notes[5]])
+        second_slur = music21.spanner.Slur([notes[3],  notes[5]])
         measure.insert(0.0, second_slur)
-        third_slur = music21.spanner.Slur([measure.notes[6],  measure.notes[8]])
+        third_slur = music21.spanner.Slur([notes[6],  notes[8]])
         measure.insert(0.0, third_slur)
-        fourth_slur = music21.spanner.Slur([measure.notes[9],  measure.notes[11]])
+        fourth_slur = music21.spanner.Slur([notes[9],  notes[11]])
         measure.insert(0.0, fourth_slur)
         tetra_row_part = music21.stream.Part()
         tetra_row_part.partName = transformation_name
@@ -0,0 +1,91 @@
+import itertools
+import os
+import re
+import numpy as np
+from dataclasses import dataclass
+from note_names import note_names
+from tone_row import tone_row
+"""
+Reads tone rows written as note names(one row per line, e.g. "C C# D Eb E F F# G Ab A Bb B")
+from a text/CSV file or any iterable of lines.
+
+Note names follow note_names.note_to_number_relations(uppercase letters, '#', 'b', '##', 'bb')
+and are separated by spaces, tabs, commas or semicolons. Empty lines and lines starting with '#' are skipped.
+
+Valid rows are yielded in (N, 12) uint8 blocks of note numbers. Lines that are not valid
+tone rows are reported(see bad_line) and skipped, so one bad line never stops the stream.
+
+Example:
+    bad_lines = []
+    for tone_rows in note_name_parser.parse_rows("rows.csv", errors=bad_lines):
+        ...
+"""
+@dataclass
+class bad_line:
+    line_number: int #starting at 1
+    line: str
+    reason: str
+
+
+class note_name_parser():
+
+    #twelve note names with separators between them
+    row_pattern = re.compile(r"[\s,;]*" + r"[\s,;]+".join([r"([A-G](?:##|bb|#|b)?)"] * 12) + r"[\s,;]*")
+
+    @classmethod
+    def parse_rows(cls, lines, block_size = 65_536, errors = None, on_error = None, line_numbers = False):
+        """
+        Yields (N, 12) uint8 arrays of the valid tone rows in lines(a file path or an iterable of lines),
+        with at most block_size rows per array.\n
+
+        Args:
+            errors (list): a bad_line is appended for every line that is not a valid tone row
+            on_error: called as on_error(bad_line) for every line that is not a valid tone row
+            line_numbers (bool): yield (tone rows, line number of every row) instead of tone rows
+        """
+        if isinstance(lines, (str, os.PathLike)):
+            with open(lines) as row_file:
+                yield from cls.parse_rows(row_file, block_size, errors, on_error, line_numbers)
+            return
+
+        def report(block_errors: list):
+            #bad lines are reported in line order
+            for error in sorted(block_errors, key=lambda error: error.line_number):
+                if errors is not None:
+                    errors.append(error)
+                if on_error is not None:
+                    on_error(error)
+
+        note_to_number = note_names.note_to_number_relations
+        numbered_lines = enumerate(lines, 1)
+        while True:
+            block_lines = list(itertools.islice(numbered_lines, block_size))
+            if len(block_lines) == 0:
+                return
+            parsed_rows = []
+            row_line_numbers = []
+            block_errors = []
+            for line_number, line in block_lines:
+                stripped_line = line.strip()
+                if stripped_line == "" or stripped_line.startswith("#"):
+                    continue
+                match = cls.row_pattern.fullmatch(line)
+                if match is None:
+                    block_errors.append(bad_line(line_number, line.rstrip("\r\n"), "Line should contain twelve note names"))
+                    continue
+                parsed_rows.append([note_to_number[note] for note in match.groups()])
+                row_line_numbers.append(line_number)
+            if len(parsed_rows) == 0:
+                report(block_errors)
+                continue
+
+            tone_rows = np.array(parsed_rows, dtype=np.uint8)
+            row_line_numbers = np.array(row_line_numbers, dtype=np.int64)
+            valid = tone_row.validate_rows(tone_rows)
+            for i in np.flatnonzero(~valid):
+                line = block_lines[row_line_numbers[i] - block_lines[0][0]][1]
+                block_errors.append(bad_line(int(row_line_numbers[i]), line.rstrip("\r\n"), "Row does not contain twelve different notes"))
+            report(block_errors)
+            if valid.any() == False:
+                continue
+            yield (tone_rows[valid], row_line_numbers[valid]) if line_numbers else tone_rows[valid]
@@ -1,4 +1,80 @@
 import numpy as np
+from types import MappingProxyType
+#Tables are created once and cannot be changed(the properties of note_names return them directly)
+_note_to_number_relations = MappingProxyType({
+    "Abb": 7,
+    "Ab": 8,
+    "A": 9,
+    "A#": 10,
+    "A##": 11,
+    "Bbb": 9,
+    "Bb": 10,
+    "B": 11,
+    "B#": 0,
+    "B##": 1,
+    "Cbb": 10,
+    "Cb": 11,
+    "C": 0,
+    "C#": 1,
+    "C##": 2,
+    "Dbb": 0,
+    "Db": 1,
+    "D": 2,
+    "D#": 3,
+    "D##": 4,
+    "Ebb": 2,
+    "Eb": 3,
+    "E": 4,
+    "E#": 5,
+    "E##": 6,
+    "Fbb": 3,
+    "Fb": 4,
+    "F": 5,
+    "F#": 6,
+    "F##": 7,
+    "Gbb": 5,
+    "Gb": 6,
+    "G": 7,
+    "G#": 8,
+    "G##": 9,
+})
+
+_number_to_sharp_relations = MappingProxyType({
+    0 :"C",
+    1 :"C#",
+    2 :"D",
+    3 :"D#",
+    4 :"E",
+    5 :"F",
+    6 :"F#",
+    7 :"G",
+    8 :"G#",
+    9 :"A",
+    10 :"A#",
+    11 :"B",
+})
+
+_number_to_sharp_treble_clef_positions = MappingProxyType({
+    0 :"C5",
+    1 :"C#5",
+    2 :"D5",
+    3 :"D#5",
+    4 :"E5",
+    5 :"F4",
+    6 :"F#4",
+    7 :"G4",
+    8 :"G#4",
+    9 :"A4",
+    10 :"A#4",
+    11 :"B4",
+})
+
+#note name of every note number, as arrays that can be indexed with arrays of note numbers
+_sharp_names = np.array([_number_to_sharp_relations[note_number] for note_number in range(12)])
+_sharp_names.flags.writeable = False
+_sharp_treble_clef_names = np.array([_number_to_sharp_treble_clef_positions[note_number] for note_number in range(12)])
+_sharp_treble_clef_names.flags.writeable = False
+
 class note_names():
     
     @classmethod
@@ -9,43 +85,7 @@ class note_names():
         'C' represents position 0
         (key = note name,  val = note number)
         """
-        return {
-            "Abb": 7,
-            "Ab": 8,
-            "A": 9,
-            "A#": 10,
-            "A##": 11,
-            "Bbb": 9,
-            "Bb": 10,
-            "B": 11,
-            "B#": 0,
-            "B##": 1,
-            "Cbb": 10,
-            "Cb": 11,
-            "C": 0,
-            "C#": 1,
-            "C##": 2,
-            "Dbb": 0,
-            "Db": 1,
-            "D": 2,
-            "D#": 3,
-            "D##": 4,
-            "Ebb": 2,
-            "Eb": 3,
-            "E": 4,
-            "E#": 5,
-            "E##": 6,
-            "Fbb": 3,
-            "Fb": 4,
-            "F": 5,
-            "F#": 6,
-            "F##": 7,
-            "Gbb": 5,
-            "Gb": 6,
-            "G": 7,
-            "G#": 8,
-            "G##": 9,
-        }
+        return _note_to_number_relations
     
     @classmethod
     @property
@@ -62,20 +102,7 @@ class note_names():
         use of this dictionary as a default representation of numerical keys that represent a
         specific note name.
         """
-        return {
-            0 :"C",
-            1 :"C#",
-            2 :"D",
-            3 :"D#",
-            4 :"E",
-            5 :"F",
-            6 :"F#",
-            7 :"G",
-            8 :"G#",
-            9 :"A",
-            10 :"A#",
-            11 :"B",
-        }
+        return _number_to_sharp_relations
     
     @classmethod
     @property
@@ -90,20 +117,7 @@ class note_names():
         'C5' represents position 0.
         
         """
-        return {
-            0 :"C5",
-            1 :"C#5",
-            2 :"D5",
-            3 :"D#5",
-            4 :"E5",
-            5 :"F4",
-            6 :"F#4",
-            7 :"G4",
-            8 :"G#4",
-            9 :"A4",
-            10 :"A#4",
-            11 :"B4",
-        }
+        return _number_to_sharp_treble_clef_positions
     
     @classmethod
     def convert_numbers_to_note_names(cls, note_number_list: np.ndarray, number_to_note_dictionary: dict) -> list:
@@ -116,4 +130,29 @@ class note_names():
         return [
             number_to_note_dictionary[note_number]
             for note_number in note_number_list
-        ]
\ No newline at end of file
+        ]
+    
+    @classmethod
+    def numbers_to_note_names(cls, note_numbers: np.ndarray, treble_clef_positions = False) -> np.ndarray:
+        """
+        Returns an array of note names with the shape of note_numbers(e.g. an (N, 12) array of tone rows).\n
+        
+        Notes are named as in number_to_sharp_relations, or number_to_sharp_treble_clef_positions
+        if treble_clef_positions = True.
+        """
+        note_numbers = np.asarray(note_numbers)
+        if note_numbers.size > 0 and (note_numbers.min() < 0 or note_numbers.max() > 11):
+            raise ValueError("Note numbers should be between 0 and 11")
+        return (_sharp_treble_clef_names if treble_clef_positions else _sharp_names)[note_numbers]
+    
+    @classmethod
+    def note_names_to_numbers(cls, note_name_array: np.ndarray) -> np.ndarray:
+        """
+        Returns an array of note numbers(see note_to_number_relations) with the shape of note_name_array.
+        """
+        unique_names, inverse = np.unique(np.asarray(note_name_array, dtype=str), return_inverse=True)
+        unknown_names = [name for name in unique_names if name not in _note_to_number_relations]
+        if unknown_names:
+            raise ValueError(f"Invalid note names: {unknown_names}")
+        unique_numbers = np.array([_note_to_number_relations[name] for name in unique_names], dtype=np.uint8)
+        return unique_numbers[inverse].reshape(np.shape(note_name_array))
@@ -0,0 +1,179 @@
+import json
+import math
+import os
+import numpy as np
+from collections.abc import Mapping
+from database_entry_creator import create_database_entry
+"""
+Columnar export of the values produced by create_database_entry, intended for
+statistics over large ranges of tone rows without the need for a database.
+
+Every shard holds a consecutive range of row numbers and stores one array per column:
+- row_number (uint64)
+- P0, R0, I0, RI0 (uint8, N * 12)
+- P0_intervals, R0_intervals, I0_intervals, RI0_intervals (int8, N * 11)
+- combinatorial_hexachords, combinatorial_tetrachords, combinatorial_trichords
+  (uint64 bitmasks, see combinatoriality.combinatorial_masks())
+
+Shards can also be appended one at a time(see numpy_shard_writer.append_shard()),
+e.g. by streaming_pipeline, in which case they may hold any set of columns.
+
+Shard directory layout:
+- manifest.json
+- shard_000000.npz          (compressed = True)
+- shard_000000/P0.npy, ...  (compressed = False, columns can be memory-mapped)
+"""
+class numpy_shard_writer():
+
+    @classmethod
+    def write_shards(cls, directory: str, first_row_number: int, last_row_number: int, shard_size = 1_000_000, batch_size = 65_536, compressed = True):
+        """
+        Writes the values of every row number in [first_row_number, last_row_number)
+        to shards of (at most) shard_size rows.\n
+
+        Rows are calculated in batches of batch_size rows, so only one shard is kept in memory.
+
+        Args:
+            directory (str): created if it does not exist
+            compressed (bool): write .npz files instead of memory-mappable .npy files
+        """
+        if first_row_number < 0 or last_row_number > math.factorial(12) or first_row_number >= last_row_number:
+            raise ValueError(f"Invalid row range({first_row_number}, {last_row_number})")
+        os.makedirs(directory, exist_ok=True)
+        for shard_start in range(first_row_number, last_row_number, shard_size):
+            shard_stop = min(shard_start + shard_size, last_row_number)
+            batches = [
+                create_database_entry.all_values_columns(batch_start, min(batch_start + batch_size, shard_stop)).as_dict()
+                for batch_start in range(shard_start, shard_stop, batch_size)
+            ]
+            shard = {name: np.concatenate([batch[name] for batch in batches]) for name in batches[0]}
+            cls.append_shard(directory, shard, compressed)
+
+    @classmethod
+    def append_shard(cls, directory: str, shard: dict, compressed = True):
+        """
+        Writes {column name : array} as the next shard of a shard directory and adds it to the manifest.
+        Every column must contain the same number of rows.\n
+
+        The manifest is rewritten after every shard, which means that an interrupted export
+        still leaves a readable set of shards.
+        """
+        manifest_path = os.path.join(directory, "manifest.json")
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as manifest_file:
+                manifest = json.load(manifest_file)
+        else:
+            os.makedirs(directory, exist_ok=True)
+            manifest = {"compressed": compressed, "columns": {}, "shards": []}
+        if manifest["compressed"] != compressed:
+            raise ValueError(f"Shards in '{directory}' are {'' if manifest['compressed'] else 'not '}compressed")
+        columns = {name: {"dtype": column.dtype.str, "shape": list(column.shape[1:])} for name, column in shard.items()}
+        if manifest["shards"] and manifest["columns"] != columns:
+            raise ValueError(f"Shard columns do not match the columns of the shards in '{directory}'")
+
+        shard_name = f"shard_{len(manifest['shards']):06d}"
+        cls.write_shard(directory, shard_name, shard, compressed)
+        row_count = len(next(iter(shard.values())))
+        shard_entry = {"name": shard_name, "rows": row_count}
+        if "row_number" in shard and row_count > 0:
+            shard_entry["first_row_number"] = int(shard["row_number"][0])
+            shard_entry["last_row_number"] = int(shard["row_number"][-1]) + 1
+        manifest["columns"] = columns
+        manifest["shards"].append(shard_entry)
+        with open(manifest_path, "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+
+    @classmethod
+    def write_shard(cls, directory: str, shard_name: str, shard: dict, compressed = True):
+        """
+        Writes {column name : array} as a single .npz file or as a directory of .npy files.
+        """
+        if compressed:
+            np.savez_compressed(os.path.join(directory, f"{shard_name}.npz"), **shard)
+            return
+        shard_directory = os.path.join(directory, shard_name)
+        os.makedirs(shard_directory, exist_ok=True)
+        for name, column in shard.items():
+            np.save(os.path.join(shard_directory, f"{name}.npy"), column)
+
+
+class numpy_shard_reader():
+
+    def __init__(self, directory: str):
+        manifest_path = os.path.join(directory, "manifest.json")
+        if os.path.exists(manifest_path) == False:
+            raise ValueError(f"Specified directory('{directory}')\n does not contain a shard manifest")
+        with open(manifest_path) as manifest_file:
+            self.__manifest = json.load(manifest_file)
+        self.__directory = directory
+
+    @property
+    def columns(self) -> list:
+        return list(self.__manifest["columns"])
+
+    @property
+    def shards(self) -> list:
+        """
+        Returns a list of {"name", "rows", "first_row_number", "last_row_number"} for every shard
+        """
+        return self.__manifest["shards"]
+
+    @property
+    def row_count(self) -> int:
+        return sum(shard["rows"] for shard in self.shards)
+
+    def load_shard(self, shard_index: int, columns = None) -> dict:
+        """
+        Returns {column name : array} for a single shard.\n
+
+        Nothing is read from disk until a column is used:
+        uncompressed columns are memory-mapped and compressed columns are
+        decompressed one column at a time when accessed.
+        """
+        shard_name = self.shards[shard_index]["name"]
+        if columns is None:
+            columns = self.columns
+        if self.__manifest["compressed"]:
+            return _lazy_npz_columns(os.path.join(self.__directory, f"{shard_name}.npz"), columns)
+        return {
+            name: np.load(os.path.join(self.__directory, shard_name, f"{name}.npy"), mmap_mode="r")
+            for name in columns
+        }
+
+    def iter_chunks(self, chunk_size = 65_536, columns = None):
+        """
+        Yields {column name : array} for consecutive chunks of (at most) chunk_size rows,
+        in row number order.\n
+
+        Chunks never span two shards.
+        """
+        for shard_index, shard in enumerate(self.shards):
+            shard_columns = self.load_shard(shard_index, columns)
+            for chunk_start in range(0, shard["rows"], chunk_size):
+                yield {name: shard_columns[name][chunk_start:chunk_start + chunk_size] for name in shard_columns}
+
+
+class _lazy_npz_columns(Mapping):
+    """
+    {column name : array} that decompresses a column of a .npz file
+    the first time it is accessed.
+    """
+
+    def __init__(self, file_path: str, columns: list):
+        self.__file_path = file_path
+        self.__columns = list(columns)
+        self.__loaded_columns = {}
+
+    def __getitem__(self, name):
+        if name not in self.__columns:
+            raise KeyError(name)
+        if name not in self.__loaded_columns:
+            with np.load(self.__file_path) as npz_file:
+                self.__loaded_columns[name] = npz_file[name]
+        return self.__loaded_columns[name]
+
+    def __iter__(self):
+        return iter(self.__columns)
+
+    def __len__(self):
+        return len(self.__columns)
@@ -0,0 +1,70 @@
+import math
+import numpy as np
+"""
+Uniformly random tone rows in blocks, from numpy.random.Generator objects.
+
+Every function takes random_generator, which is a numpy.random.Generator, a seed(int or
+numpy.random.SeedSequence) or None(unpredictable seed). The same seed always produces the same rows.
+
+Parallel workers should each get their own generator from spawn_generators(), which
+splits one seed into independent streams:
+
+    seed_sequences = np.random.SeedSequence(1234).spawn(8)
+    #in worker i:
+    for tone_rows in random_rows.iter_rows(10_000_000, random_generator=seed_sequences[i]):
+        ...
+"""
+class random_rows():
+
+    @classmethod
+    def generate_rows(cls, row_count: int, random_generator = None, fix_first_note = False) -> np.ndarray:
+        """
+        Returns a (row_count, 12) uint8 array of uniformly random tone rows.
+        With fix_first_note = True, every row starts on note 0.\n
+
+        Rows are shuffled in one call(Generator.permuted(), a Fisher-Yates shuffle of every row).
+        """
+        random_generator = cls.as_generator(random_generator)
+        if fix_first_note:
+            tone_rows = np.zeros((row_count, 12), dtype=np.uint8)
+            tone_rows[:, 1:] = random_generator.permuted(np.broadcast_to(np.arange(1, 12, dtype=np.uint8), (row_count, 11)), axis=1)
+            return tone_rows
+        return random_generator.permuted(np.broadcast_to(np.arange(12, dtype=np.uint8), (row_count, 12)), axis=1)
+
+    @classmethod
+    def generate_row_numbers(cls, row_count: int, random_generator = None, fix_first_note = False) -> np.ndarray:
+        """
+        Returns row_count uniformly random row numbers(int64) instead of tone rows:
+        between 0 and 12! - 1, or 11! - 1 with fix_first_note = True.\n
+
+        Row numbers are converted to tone rows by
+        permutation_calculator.find_permutations(row_numbers, 12, fix_first_note).
+        """
+        universe_size = math.factorial(11 if fix_first_note else 12)
+        return cls.as_generator(random_generator).integers(0, universe_size, size=row_count, dtype=np.int64)
+
+    @classmethod
+    def iter_rows(cls, row_count: int, block_size = 1_000_000, random_generator = None, fix_first_note = False, row_numbers = False):
+        """
+        Yields row_count random tone rows in blocks of at most block_size rows
+        (or random row numbers with row_numbers = True), so that any number of rows
+        can be generated in constant memory.
+        """
+        random_generator = cls.as_generator(random_generator)
+        generate = cls.generate_row_numbers if row_numbers else cls.generate_rows
+        for block_start in range(0, row_count, block_size):
+            yield generate(min(block_size, row_count - block_start), random_generator, fix_first_note)
+
+    @classmethod
+    def spawn_generators(cls, seed, count: int) -> list:
+        """
+        Returns count independent generators derived from one seed(e.g. one for every worker process)
+        """
+        seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        return [np.random.default_rng(child_sequence) for child_sequence in seed_sequence.spawn(count)]
+
+    @classmethod
+    def as_generator(cls, random_generator) -> np.random.Generator:
+        if isinstance(random_generator, np.random.Generator):
+            return random_generator
+        return np.random.default_rng(random_generator)
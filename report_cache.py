@@ -0,0 +1,178 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from music_xml_template_writer import music_xml_template_writer
+"""
+Disk cache of twelve-tone reports(see music_xml_writer.write_twelvetone_report()).
+
+Every report is stored once as a .musicxml(or .musicxml.gz) file, named after a sha256 hash of
+(prime row, score title, include_combinatorials, backend, writer version). When the cache grows
+beyond max_size bytes, the least recently used reports are removed.
+The modification time of a report is used as its last use.
+
+Example:
+    cache = report_cache("./report_cache", max_size=100_000_000, compressed=True)
+    with open("report.musicxml", "wb") as xml_file:
+        cache.write_report(prime_row, xml_file)
+"""
+class report_cache():
+
+    #increase when the written MusicXML changes, so that old reports are not served anymore
+    writer_version = 1
+
+    def __init__(self, directory: str, max_size = 256 * 1024 * 1024, compressed = False, backend = "template"):
+        """
+        Creates directory if it does not exist.\n
+
+        Args:
+            max_size (int): maximum number of bytes of all cached reports
+            compressed (bool): store reports as gzip files
+            backend (str): "template" or "music21"(see music_xml_writer.write_twelvetone_report())
+        """
+        if backend not in ("music21", "template"):
+            raise ValueError(f"Invalid backend('{backend}'), backend must be 'music21' or 'template'")
+        if max_size <= 0:
+            raise ValueError(f"Invalid cache size({max_size}), cache size must be positive")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_size = max_size
+        self.compressed = compressed
+        self.backend = backend
+
+    def key(self, prime_row: np.ndarray, score_title = None, include_combinatorials = True) -> str:
+        """
+        Returns the hash that identifies a report
+        """
+        key_values = [[int(note) for note in prime_row], score_title, bool(include_combinatorials), self.backend, self.writer_version]
+        return hashlib.sha256(json.dumps(key_values).encode("utf-8")).hexdigest()
+
+    def report_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + (".musicxml.gz" if self.compressed else ".musicxml"))
+
+    def write_report(self, prime_row: np.ndarray, output, score_title = None, include_combinatorials = True) -> bool:
+        """
+        Streams a report to output(a file path or a file-like object opened in binary mode).
+        The report is created and cached first if it is not in the cache.\n
+
+        Returns True if the report was already cached.
+        """
+        with self.open_report(prime_row, score_title, include_combinatorials) as (report_file, cache_hit):
+            if isinstance(output, (str, os.PathLike)):
+                with open(output, "wb") as output_file:
+                    shutil.copyfileobj(report_file, output_file)
+            else:
+                shutil.copyfileobj(report_file, output)
+        return cache_hit
+
+    def open_report(self, prime_row: np.ndarray, score_title = None, include_combinatorials = True, decompress = True) -> "_cached_report":
+        """
+        Returns a context manager that yields (binary file object of the report, cache hit).
+        decompress = False yields the gzip file itself if the cache is compressed.
+        """
+        key = self.key(prime_row, score_title, include_combinatorials)
+        report_path = self.report_path(key)
+        cache_hit = True
+        try:
+            report_file = open(report_path, "rb")
+            os.utime(report_path)
+        except FileNotFoundError:
+            cache_hit = False
+            self.create_report(report_path, prime_row, score_title, include_combinatorials)
+            report_file = open(report_path, "rb")
+            self.evict(keep=report_path)
+        if self.compressed and decompress:
+            return _cached_report(gzip.GzipFile(fileobj=report_file, mode="rb"), cache_hit, report_file)
+        return _cached_report(report_file, cache_hit)
+
+    def create_report(self, report_path: str, prime_row: np.ndarray, score_title = None, include_combinatorials = True):
+        """
+        Writes a report to a temporary file and moves it to report_path once it is complete,
+        so that a report that is still being written is never served.
+        """
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with open(file_descriptor, "wb") as temporary_file:
+                if self.compressed:
+                    with gzip.GzipFile(fileobj=temporary_file, mode="wb") as gzip_file:
+                        self.write_uncached_report(gzip_file, prime_row, score_title, include_combinatorials)
+                else:
+                    self.write_uncached_report(temporary_file, prime_row, score_title, include_combinatorials)
+            os.replace(temporary_path, report_path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+    def write_uncached_report(self, binary_file, prime_row: np.ndarray, score_title = None, include_combinatorials = True):
+        if self.backend == "template":
+            music_xml_template_writer.write_twelvetone_report(prime_row, binary_file, score_title, include_combinatorials)
+            return
+        from music_xml_writer import music_xml_writer
+        with tempfile.TemporaryDirectory(dir=self.directory) as score_directory:
+            score_path = os.path.join(score_directory, "report.musicxml")
+            music_xml_writer.create_twelve_tone_report_xml(prime_row, score_title, include_combinatorials).write("musicxml", score_path)
+            with open(score_path, "rb") as score_file:
+                shutil.copyfileobj(score_file, binary_file)
+
+    def cached_reports(self) -> list:
+        """
+        Returns [(last use, size in bytes, file path)] of every cached report, least recently used first
+        """
+        reports = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith((".musicxml", ".musicxml.gz")):
+                    try:
+                        status = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    reports.append((status.st_mtime_ns, status.st_size, entry.path))
+        return sorted(reports)
+
+    def size(self) -> int:
+        """
+        Returns the number of bytes of all cached reports
+        """
+        return sum(size for _, size, _ in self.cached_reports())
+
+    def evict(self, keep = None):
+        """
+        Removes the least recently used reports until the cache is not larger than max_size.
+        The report at the path keep(e.g. a report that was just created) is never removed.
+        """
+        reports = self.cached_reports()
+        cache_size = sum(size for _, size, _ in reports)
+        for _, size, report_path in reports:
+            if cache_size <= self.max_size:
+                return
+            if report_path == keep:
+                continue
+            try:
+                os.remove(report_path)
+            except FileNotFoundError:
+                pass
+            cache_size -= size
+
+    def clear(self):
+        for _, _, report_path in self.cached_reports():
+            os.remove(report_path)
+
+
+class _cached_report():
+
+    def __init__(self, report_file, cache_hit: bool, compressed_file = None):
+        self.report_file = report_file
+        self.cache_hit = cache_hit
+        #GzipFile does not close the file it reads from
+        self.compressed_file = compressed_file
+
+    def __enter__(self):
+        return self.report_file, self.cache_hit
+
+    def __exit__(self, *exc_info):
+        self.report_file.close()
+        if self.compressed_file is not None:
+            self.compressed_file.close()
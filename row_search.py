@@ -0,0 +1,293 @@
+import numpy as np
+from combinatoriality import combinatoriality
+"""
+Finds every tone row with given structural properties without testing all 12! permutations.
+
+Rows are built note by note, a block of prefixes at a time. Every prefix keeps bitmasks of its used notes
+and used intervals, and a prefix is dropped as soon as it can no longer become a row that meets the constraints:
+    all_interval: every interval(ascending semitones, 1-11) between neighbouring notes is used once
+    intervals: only these intervals are used between neighbouring notes
+    segments: every segment of segment_size notes holds the notes of one of these segments(regardless of order)
+    combinatorials: the rows are combinatorial at these transformations(see combinatoriality.combinatorial_masks())
+    combinatorial_types: the rows are combinatorial at one or more transformations of every type("P", "R", "I", "RI"),
+        e.g. ("P", "R", "I", "RI") for all-combinatorial rows
+
+Prefixes are extended depth first, so memory stays bounded and rows are yielded in ascending
+(lexicographic) order while the search is running.
+
+Examples:
+    all_interval_rows = row_search.find_rows(all_interval=True) #3856 rows starting on note 0
+    derived_rows = row_search.find_rows(segment_size=3, segments=row_search.segment_forms([0, 1, 4]))
+    for tone_rows in row_search.search_rows(first_note=None, combinatorial_types=("P", "R", "I", "RI")):
+        ...
+"""
+class row_search():
+
+    _invariance_tables = None
+
+    @classmethod
+    def search_rows(cls, first_note = 0, all_interval = False, intervals = None, segment_size = None, segments = None,
+                    combinatorials = None, combinatorial_types = None, combinatorial_size = 6, block_size = 65_536, limit = None):
+        """
+        Yields (N, 12) uint8 arrays of the tone rows that meet every constraint, with at most block_size rows per array.\n
+
+        Args:
+            first_note: note that starts every row, None searches rows starting on any note
+            all_interval (bool): only all-interval rows
+            intervals: allowed intervals between neighbouring notes, in ascending semitones(1-11)
+            segment_size: size of the segments constrained by segments(6, 4, 3 or 2)
+            segments: (S, segment_size) notes of the allowed segments, e.g. row_search.segment_forms([0, 1, 4])
+            combinatorials: transformation names(e.g. ["I5"]) or a uint64 mask ordered as tone_row.transformation_names()
+            combinatorial_types: transformation types("P", "R", "I", "RI") that need at least one combinatorial transformation
+            combinatorial_size: segment size of combinatorials and combinatorial_types(6, 4 or 3)
+            limit: stop after this many rows
+        """
+        constraints = cls.create_constraints(first_note, all_interval, intervals, segment_size, segments, combinatorials, combinatorial_types, combinatorial_size)
+        first_notes = np.arange(12, dtype=np.uint8) if first_note is None else np.array([first_note], dtype=np.uint8)
+        rows = np.zeros((len(first_notes), 12), dtype=np.uint8)
+        rows[:, 0] = first_notes
+        candidates = np.full((len(first_notes), 4), 0xFFF, dtype=np.uint16)
+        first_block = (1, rows, combinatoriality.note_bits()[first_notes], np.zeros(len(first_notes), dtype=np.uint16), candidates)
+        yield from cls.depth_first_search(first_block, lambda block: cls.extend_rows(*block, constraints), 12,
+                                          lambda block: cls.filter_combinatorials(block[1], constraints), block_size, limit)
+
+    @classmethod
+    def depth_first_search(cls, first_block: tuple, extend, final_depth: int, finish, block_size = 65_536, limit = None):
+        """
+        Runs a depth first search one block of partial results at a time and yields the results
+        in blocks of at most block_size(at most limit results in total).\n
+
+        Args:
+            first_block: (depth, array, array, ...) where every array holds one entry per partial result
+            extend: called as extend(block), returns the block of every valid partial result one level deeper
+            final_depth: depth of complete results
+            finish: called as finish(block) for a block of complete results, returns the array of results to yield
+        """
+        if limit is not None and limit <= 0:
+            return
+        stack = [first_block]
+        found = None
+        result_count = 0
+        while stack:
+            block = stack.pop()
+            if len(block[1]) > block_size:
+                #later chunks are pushed first, so that results stay in ascending order
+                for start in range((len(block[1]) - 1) // block_size * block_size, -1, -block_size):
+                    stack.append((block[0],) + tuple(array[start:start + block_size] for array in block[1:]))
+                continue
+            block = extend(block)
+            if len(block[1]) == 0:
+                continue
+            if block[0] < final_depth:
+                stack.append(block)
+                continue
+
+            results = finish(block)
+            if limit is not None:
+                results = results[:limit - result_count]
+            result_count += len(results)
+            found = results if found is None else np.concatenate([found, results])
+            while len(found) >= block_size:
+                yield found[:block_size]
+                found = found[block_size:]
+            if limit is not None and result_count >= limit:
+                break
+        if found is not None and len(found) > 0:
+            yield found
+
+    @classmethod
+    def find_rows(cls, **constraints) -> np.ndarray:
+        """
+        Returns an (N, 12) uint8 array of every tone row that meets the constraints(see search_rows())
+        """
+        return np.concatenate([np.zeros((0, 12), dtype=np.uint8), *cls.search_rows(**constraints)])
+
+    @classmethod
+    def count_rows(cls, **constraints) -> int:
+        """
+        Returns the number of tone rows that meet the constraints(see search_rows())
+        """
+        return sum(len(tone_rows) for tone_rows in cls.search_rows(**constraints))
+
+    @classmethod
+    def segment_forms(cls, segment) -> np.ndarray:
+        """
+        Returns the notes(in ascending order) of every distinct transposition and inversion of a segment,
+        e.g. the allowed segments of rows derived from a trichord
+        """
+        segment = np.asarray(segment, dtype=np.int64)
+        forms = np.concatenate([(segment + np.arange(12)[:, None]) % 12, (np.arange(12)[:, None] - segment) % 12])
+        return np.unique(np.sort(forms, axis=1), axis=0).astype(np.uint8)
+
+    @classmethod
+    def create_constraints(cls, first_note, all_interval, intervals, segment_size, segments, combinatorials, combinatorial_types, combinatorial_size) -> dict:
+        if first_note is not None and first_note not in range(12):
+            raise ValueError(f"Invalid first note({first_note}), first note must be between 0 and 11 or None")
+        interval_mask = 0xFFE
+        if intervals is not None:
+            intervals = np.asarray(intervals, dtype=np.int64).ravel()
+            if ((intervals < 1) | (intervals > 11)).any():
+                raise ValueError("Every interval must be between 1 and 11 semitones")
+            interval_mask = int(np.bitwise_or.reduce(1 << intervals, initial=0))
+
+        extendable_segments = None
+        if segments is not None:
+            if segment_size not in (6, 4, 3, 2):
+                raise ValueError(f"Invalid segment size({segment_size}), segment size must be 6, 4, 3 or 2")
+            segments = np.asarray(segments, dtype=np.int64).reshape(-1, segment_size)
+            if ((segments < 0) | (segments > 11)).any():
+                raise ValueError("Every note of segments must be between 0 and 11")
+            if (np.diff(np.sort(segments, axis=1), axis=1) == 0).any():
+                raise ValueError("The notes of every segment must be different")
+            allowed_masks = combinatoriality.note_bits()[segments].sum(axis=1, dtype=np.uint16)
+            #a partial segment can be completed if it is a subset of an allowed segment
+            extendable_segments = np.zeros(4096, dtype=bool)
+            extendable_segments[allowed_masks] = True
+            masks = np.arange(4096)
+            for note in range(12):
+                extendable_segments |= extendable_segments[masks | (1 << note)]
+
+        combinatorial_mask = 0
+        if combinatorials is not None:
+            combinatorial_mask = combinatoriality.transformations_to_mask(combinatorials)
+        type_masks = []
+        for combinatorial_type in combinatorial_types or ():
+            if combinatorial_type not in ("P", "R", "I", "RI"):
+                raise ValueError(f"Invalid transformation type({combinatorial_type}), type must be P, R, I or RI")
+            type_index = ("P", "R", "I", "RI").index(combinatorial_type)
+            type_masks.append((type_index, 0xFFF << (12 * type_index)))
+        if (combinatorial_mask or type_masks) and combinatorial_size not in (6, 4, 3):
+            raise ValueError(f"Invalid segment size({combinatorial_size}), segment size must be 6, 4 or 3")
+
+        return {"all_interval": all_interval, "interval_mask": interval_mask, "segment_size": segment_size,
+                "extendable_segments": extendable_segments, "combinatorial_size": combinatorial_size,
+                #required transpositions of every transformation type(P, R, I, RI)
+                "required": [(combinatorial_mask >> (12 * type_index)) & 0xFFF for type_index in range(4)],
+                "combinatorial_mask": combinatorial_mask, "type_masks": type_masks}
+
+    @classmethod
+    def extend_rows(cls, depth: int, rows: np.ndarray, used_notes: np.ndarray, used_intervals: np.ndarray, candidates: np.ndarray, constraints: dict) -> tuple:
+        """
+        Extends every prefix of depth notes by every note that keeps it valid
+        """
+        notes = np.arange(12, dtype=np.uint16)
+        note_bits = combinatoriality.note_bits()
+        intervals = ((notes.astype(np.int16) - rows[:, depth - 1:depth]) % 12).astype(np.uint16)
+        valid = ((used_notes[:, None] >> notes) & 1) == 0
+        valid &= ((constraints["interval_mask"] >> intervals) & 1) == 1
+        if constraints["all_interval"]:
+            valid &= ((used_intervals[:, None] >> intervals) & 1) == 0
+        parents, next_notes = np.nonzero(valid)
+
+        rows = rows[parents]
+        rows[:, depth] = next_notes
+        used_notes = used_notes[parents] | note_bits[next_notes]
+        used_intervals = used_intervals[parents] | note_bits[intervals[parents, next_notes]]
+        candidates = candidates[parents]
+        depth += 1
+
+        keep = np.ones(len(rows), dtype=bool)
+        if constraints["extendable_segments"] is not None:
+            segment_start = (depth - 1) // constraints["segment_size"] * constraints["segment_size"]
+            partial_segments = note_bits[rows[:, segment_start:depth]].sum(axis=1, dtype=np.uint16)
+            keep &= constraints["extendable_segments"][partial_segments]
+        if (constraints["combinatorial_mask"] or constraints["type_masks"]) and depth % constraints["combinatorial_size"] == 0:
+            keep &= cls.update_candidates(depth, rows, candidates, constraints)
+        if constraints["required"][1] | constraints["required"][3] and 12 - constraints["combinatorial_size"] <= depth < 12:
+            keep &= cls.possible_last_notes(rows, used_notes, candidates, constraints)
+        return depth, rows[keep], used_notes[keep], used_intervals[keep], candidates[keep]
+
+    @classmethod
+    def update_candidates(cls, depth: int, rows: np.ndarray, candidates: np.ndarray, constraints: dict) -> np.ndarray:
+        """
+        Narrows the combinatorial candidates of every row after a segment is completed(in place) and
+        returns which rows can still meet the combinatorial constraints.\n
+
+        Candidates are 12-bit masks of the operations that map every completed segment onto the segment at the same position of the row:
+            P: T(n)(segment j) = segment j, for Pn
+            I: I(m)(segment j) = segment j, for In with m = 2 * first note + n
+            R: T(t)(segment k-1-j) = segment j, for Rn with t = first note - last note + n
+            RI: I(m)(segment k-1-j) = segment j, for RIn with m = first note + last note + n
+        where I(m) maps note x to m - x.
+        """
+        inverted_masks, transpositions, inversions = cls.invariance_tables()
+        transposed_masks = combinatoriality.transposed_masks()
+        segment_size = constraints["combinatorial_size"]
+        segment_count = 12 // segment_size
+        segment_index = depth // segment_size - 1
+        note_bits = combinatoriality.note_bits()
+        segments = note_bits[rows[:, :depth].reshape(len(rows), -1, segment_size)].sum(axis=-1, dtype=np.uint16)
+        candidates[:, 0] &= transpositions[segments[:, segment_index]]
+        candidates[:, 2] &= inversions[segments[:, segment_index]]
+        if depth == 12 - segment_size:
+            #the last segment holds the remaining notes, so R and RI can be narrowed one segment early
+            segments = np.concatenate([segments, (0xFFF ^ np.bitwise_or.reduce(segments, axis=1))[:, None]], axis=1)
+        for first_index in range(segment_count):
+            mirror_index = segment_count - 1 - first_index
+            if max(first_index, mirror_index) < segment_index or max(first_index, mirror_index) >= segments.shape[1]:
+                continue
+            segment = segments[:, first_index, None]
+            mirror = segments[:, mirror_index]
+            candidates[:, 1] &= ((transposed_masks[mirror] == segment) * note_bits).sum(axis=1, dtype=np.uint16)
+            candidates[:, 3] &= ((transposed_masks[inverted_masks[mirror]] == segment) * note_bits).sum(axis=1, dtype=np.uint16)
+
+        required = constraints["required"]
+        possible = np.ones(len(rows), dtype=bool)
+        possible &= (candidates[:, 0] & required[0]) == required[0]
+        required_inversions = transposed_masks[required[2], (2 * rows[:, 0].astype(np.int64)) % 12]
+        possible &= (candidates[:, 2] & required_inversions) == required_inversions
+        possible &= (candidates[:, 1] != 0) | (required[1] == 0)
+        possible &= (candidates[:, 3] != 0) | (required[3] == 0)
+        for type_index, _ in constraints["type_masks"]:
+            #P0 itself does not count as a combinatorial transformation
+            possible &= (candidates[:, type_index] & (0xFFE if type_index == 0 else 0xFFF)) != 0
+        return possible
+
+    @classmethod
+    def possible_last_notes(cls, rows: np.ndarray, used_notes: np.ndarray, candidates: np.ndarray, constraints: dict) -> np.ndarray:
+        """
+        Returns which rows in their last segment can still meet the required R and RI transformations:
+        their candidates(see update_candidates()) depend on the last note, which is one of the unused notes.
+        """
+        transposed_masks = combinatoriality.transposed_masks()
+        required = constraints["required"]
+        first_notes = rows[:, :1].astype(np.int64)
+        last_notes = np.arange(12)
+        unused_notes = ((used_notes[:, None] >> last_notes.astype(np.uint16)) & 1) == 0
+        required_retrogrades = transposed_masks[required[1], (first_notes - last_notes) % 12]
+        required_inversions = transposed_masks[required[3], (first_notes + last_notes) % 12]
+        return (unused_notes & ((candidates[:, 1, None] & required_retrogrades) == required_retrogrades)
+                & ((candidates[:, 3, None] & required_inversions) == required_inversions)).any(axis=1)
+
+    @classmethod
+    def filter_combinatorials(cls, tone_rows: np.ndarray, constraints: dict) -> np.ndarray:
+        """
+        Returns the complete rows that meet the combinatorial constraints exactly
+        """
+        if constraints["combinatorial_mask"] == 0 and len(constraints["type_masks"]) == 0:
+            return tone_rows
+        masks = combinatoriality.combinatorial_masks(tone_rows, constraints["combinatorial_size"])
+        required_mask = np.uint64(constraints["combinatorial_mask"])
+        matches = (masks & required_mask) == required_mask
+        for _, type_mask in constraints["type_masks"]:
+            matches &= (masks & np.uint64(type_mask)) != 0
+        return tone_rows[matches]
+
+    @classmethod
+    def invariance_tables(cls) -> tuple:
+        """
+        Returns three (4096,) uint16 tables indexed by segment mask:
+            the mask of the inverted segment(x -> -x)
+            bit n is set if the segment is unchanged by transposing it n semitones
+            bit m is set if the segment is unchanged by the inversion x -> m - x
+        """
+        if cls._invariance_tables is None:
+            transposed_masks = combinatoriality.transposed_masks()
+            masks = np.arange(4096, dtype=np.uint16)
+            note_bits = combinatoriality.note_bits()
+            mask_bits = (masks[:, None] >> np.arange(12, dtype=np.uint16)) & 1
+            inverted_masks = (mask_bits[:, (-np.arange(12)) % 12] * note_bits).sum(axis=1, dtype=np.uint16)
+            transpositions = ((transposed_masks == masks[:, None]) * note_bits).sum(axis=1, dtype=np.uint16)
+            inversions = ((transposed_masks[inverted_masks] == masks[:, None]) * note_bits).sum(axis=1, dtype=np.uint16)
+            cls._invariance_tables = (inverted_masks, transpositions, inversions)
+        return cls._invariance_tables
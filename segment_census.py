@@ -0,0 +1,131 @@
+import math
+import os
+import tempfile
+import numpy as np
+from combinatoriality import combinatoriality
+from set_classes import set_classes
+from universe_scanner import universe_scanner
+"""
+Segment statistics of the permutation universe, e.g. how many of the 12! rows have a first hexachord of set class 6-Z44,
+or how the set classes of trichords are distributed over the four trichord positions.
+
+A census walks the 11! rows that start on note 0 once(see universe_scanner.scan_universe()) and counts the pitch-class
+mask of every segment at every position for every segment size(6, 4, 3 and 2), with one np.bincount() per chunk.
+Set class counts are reduced from the mask counts(see set_classes).
+Rows that start on other notes are transpositions of these rows, so their counts are derived instead of scanned.
+
+With a directory, the census is saved as a .npz file the first time it is calculated, and
+every later query(in any process) loads it instead of scanning the universe again:
+
+    segment_census.count_rows("6-Z44", 6, position=0, fix_first=False, directory="./census")
+"""
+class segment_census():
+
+    segment_sizes = (6, 4, 3, 2)
+
+    @classmethod
+    def census(cls, directory = None, fix_first = True, workers = None, first_row_number = 0, last_row_number = None, progress = None, cancel = None) -> dict:
+        """
+        Returns {segment_size: (12 / segment_size, 4096) int64 array} where [position, mask] is the number of rows
+        whose segment at position holds the notes of mask.\n
+
+        Args:
+            directory: directory of saved census files, None always scans the universe
+            fix_first (bool): only count the 11! rows that start on note 0, otherwise count all 12! rows
+            first_row_number, last_row_number: census of [first_row_number, last_row_number) of the rows that start on note 0
+                (and all their transpositions with fix_first = False)
+            workers, progress, cancel: see universe_scanner.scan_universe()
+        """
+        if last_row_number is None:
+            last_row_number = math.factorial(11)
+        census_path = None if directory is None else cls.census_path(directory, first_row_number, last_row_number)
+        if census_path is not None and os.path.exists(census_path):
+            with np.load(census_path) as census_file:
+                mask_counts = {segment_size: census_file[f"segment_size_{segment_size}"] for segment_size in cls.segment_sizes}
+        else:
+            mask_counts = universe_scanner.scan_universe(cls.count_segment_masks, cls.add_mask_counts, workers=workers,
+                                                         first_row_number=first_row_number, last_row_number=last_row_number,
+                                                         progress=progress, cancel=cancel)
+            if census_path is not None:
+                cls.save_census(mask_counts, census_path)
+        if fix_first:
+            return mask_counts
+        return {segment_size: cls.transpose_counts(counts) for segment_size, counts in mask_counts.items()}
+
+    @classmethod
+    def mask_counts(cls, segment_size: int, **census_options) -> np.ndarray:
+        """
+        Returns the (12 / segment_size, 4096) mask counts of a segment size(see census() for options)
+        """
+        if segment_size not in cls.segment_sizes:
+            raise ValueError(f"Invalid segment size({segment_size}), segment size must be 6, 4, 3 or 2")
+        return cls.census(**census_options)[segment_size]
+
+    @classmethod
+    def set_class_counts(cls, segment_size: int, **census_options) -> np.ndarray:
+        """
+        Returns a (12 / segment_size, 224) int64 array where [position, set class] is the number of rows
+        whose segment at position belongs to the set class(see set_classes)
+        """
+        mask_counts = cls.mask_counts(segment_size, **census_options)
+        class_counts = np.zeros((len(mask_counts), len(set_classes.set_class_table().forte_names)), dtype=np.int64)
+        np.add.at(class_counts, (slice(None), set_classes.set_class_table().class_indices), mask_counts)
+        return class_counts
+
+    @classmethod
+    def count_rows(cls, forte_name: str, segment_size: int, position = 0, **census_options) -> int:
+        """
+        Returns the number of rows whose segment at position belongs to a set class, e.g. ("6-Z44", 6, 0)
+        """
+        return int(cls.set_class_counts(segment_size, **census_options)[position, set_classes.find_set_class(forte_name)])
+
+    @classmethod
+    def count_segment_masks(cls, tone_rows: np.ndarray, first_row_number: int) -> dict:
+        """
+        Kernel of the census: counts the mask of every segment position of a chunk of tone rows
+        """
+        mask_counts = {}
+        for segment_size in cls.segment_sizes:
+            segment_count = 12 // segment_size
+            positions = np.arange(segment_count, dtype=np.intp) * 4096
+            masks = combinatoriality.segment_masks(tone_rows, segment_size).astype(np.intp) + positions
+            mask_counts[segment_size] = np.bincount(masks.ravel(), minlength=segment_count * 4096).reshape(segment_count, 4096)
+        return mask_counts
+
+    @classmethod
+    def add_mask_counts(cls, mask_counts: dict, chunk_counts: dict) -> dict:
+        for segment_size, counts in chunk_counts.items():
+            mask_counts[segment_size] += counts
+        return mask_counts
+
+    @classmethod
+    def transpose_counts(cls, mask_counts: np.ndarray) -> np.ndarray:
+        """
+        Returns the mask counts of every transposition of the counted rows
+        """
+        transposed_masks = combinatoriality.transposed_masks()
+        transposed_counts = np.zeros_like(mask_counts)
+        for semitones in range(12):
+            #transposing is a permutation of the masks
+            transposed_counts[:, transposed_masks[:, semitones]] += mask_counts
+        return transposed_counts
+
+    @classmethod
+    def census_path(cls, directory, first_row_number: int, last_row_number: int) -> str:
+        return os.path.join(directory, f"segment_census_{first_row_number}_{last_row_number}.npz")
+
+    @classmethod
+    def save_census(cls, mask_counts: dict, census_path: str):
+        """
+        Saves a census in a temporary file first, so that a census file is always complete
+        """
+        directory = os.path.dirname(census_path) or "."
+        os.makedirs(directory, exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix=".npz.tmp")
+        try:
+            with open(file_descriptor, "wb") as census_file:
+                np.savez(census_file, **{f"segment_size_{segment_size}": counts for segment_size, counts in mask_counts.items()})
+            os.replace(temporary_path, census_path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
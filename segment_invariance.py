@@ -0,0 +1,58 @@
+import numpy as np
+from combinatoriality import combinatoriality
+from form_positions import form_positions
+from tone_row import tone_row
+"""
+Invariance between every pair of the 48 forms of a tone row(or of N rows at once).
+
+Two forms share an invariant segment if their segments at the same position hold the same notes,
+regardless of order. The segment masks(see combinatoriality.segment_masks()) of all 48 forms are calculated once
+and compared pairwise with broadcasting, so every matrix is indexed [form a, form b] in the order of
+tone_row.transformation_names().
+
+Example(pairs of forms with the same first hexachord content):
+    invariant_segments = segment_invariance.invariance_matrices(prime_row, 6)
+    first_hexachord_pairs = np.argwhere(invariant_segments[:, :, 0])
+"""
+class segment_invariance():
+
+    @classmethod
+    def invariance_matrices(cls, prime_rows: np.ndarray, segment_size: int) -> np.ndarray:
+        """
+        Returns (48, 48, 12 / segment_size) bool matrices, (N, 48, 48, 12 / segment_size) for (N, 12) rows,
+        where [a, b, j] is True if segment j of form a and segment j of form b hold the same notes
+        """
+        segment_masks = combinatoriality.segment_masks(tone_row.all_transformations(prime_rows), segment_size)
+        return segment_masks[..., :, None, :] == segment_masks[..., None, :, :]
+
+    @classmethod
+    def invariant_segment_counts(cls, prime_rows: np.ndarray, segment_size: int) -> np.ndarray:
+        """
+        Returns (48, 48) uint8 matrices of the number of invariant segments of every pair of forms
+        """
+        return cls.invariance_matrices(prime_rows, segment_size).sum(axis=-1, dtype=np.uint8)
+
+    @classmethod
+    def shared_dyad_matrices(cls, prime_rows: np.ndarray, same_positions = False) -> np.ndarray:
+        """
+        Returns (48, 48) uint8 matrices where [a, b] is the number of ordered adjacent dyads of form a
+        that are also adjacent dyads of form b, only counting dyads at the same positions with same_positions = True
+        """
+        forms = tone_row.all_transformations(prime_rows)
+        if same_positions:
+            same_notes = forms[..., :, None, :] == forms[..., None, :, :]
+            return (same_notes[..., :-1] & same_notes[..., 1:]).sum(axis=-1, dtype=np.uint8)
+        positions = form_positions.positions(forms).astype(np.int8)
+        #positions in form b of the notes of form a, (..., a, b, 12)
+        note_positions = np.take_along_axis(positions[..., None, :, :], np.broadcast_to(forms[..., :, None, :].astype(np.intp), forms.shape[:-2] + (48, 48, 12)), axis=-1)
+        return (np.diff(note_positions, axis=-1) == 1).sum(axis=-1, dtype=np.uint8)
+
+    @classmethod
+    def invariant_pairs(cls, prime_row: np.ndarray, segment_size: int, minimum_segments = 1) -> list:
+        """
+        Returns the (form a, form b) names of every pair of different forms of a row with at least
+        minimum_segments invariant segments, each pair once
+        """
+        counts = cls.invariant_segment_counts(prime_row, segment_size)
+        transformation_names = tone_row.transformation_names()
+        return [(transformation_names[a], transformation_names[b]) for a, b in np.argwhere(np.triu(counts >= minimum_segments, k=1))]
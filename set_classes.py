@@ -0,0 +1,178 @@
+import numpy as np
+from dataclasses import dataclass
+from combinatoriality import combinatoriality
+"""
+Set classes(Forte) of pitch-class sets and row segments, from a 4096-entry table indexed by
+12-bit pitch-class mask(bit n is set if note n is in the set, see combinatoriality.segment_masks()).
+
+Set classes are numbered 0-223 in Forte order(by cardinality, then by Forte number), starting with the empty set(0-1),
+so that one int16 class index per segment is enough to look up its Forte name, prime form, interval vector and Z-relation.
+
+Example(Forte names of both hexachords of every row):
+    class_indices = set_classes.classify_segments(tone_rows, 6)
+    forte_names = set_classes.set_class_table().forte_names[class_indices]
+"""
+@dataclass
+class set_class_table:
+    class_indices: np.ndarray #(4096,) int16, set class of every pitch-class mask
+    forte_names: np.ndarray #(224,) Forte names, e.g. "6-Z44"
+    prime_forms: np.ndarray #(224,) uint16 pitch-class masks of the prime forms
+    interval_vectors: np.ndarray #(224, 6) uint8 interval-class vectors
+    z_partners: np.ndarray #(224,) int16 set class with the same interval vector, -1 if there is none
+
+
+class set_classes():
+
+    #prime forms(Forte) of every cardinality in Forte number order, "A" and "B" are notes 10 and 11
+    forte_prime_forms = (
+        #0
+        ("",),
+        #1
+        ("0",),
+        #2
+        ("01", "02", "03", "04", "05", "06"),
+        #3
+        ("012", "013", "014", "015", "016", "024", "025", "026", "027", "036", "037", "048"),
+        #4
+        ("0123", "0124", "0134", "0125", "0126", "0127", "0145", "0156", "0167", "0235", "0135", "0236", "0136",
+         "0237", "0146", "0157", "0347", "0147", "0148", "0158", "0246", "0247", "0257", "0248", "0268", "0358",
+         "0258", "0369", "0137"),
+        #5
+        ("01234", "01235", "01245", "01236", "01237", "01256", "01267", "02346", "01246", "01346", "02347", "01356",
+         "01248", "01257", "01268", "01347", "01348", "01457", "01367", "01378", "01458", "01478", "02357", "01357",
+         "02358", "02458", "01358", "02368", "01368", "01468", "01369", "01469", "02468", "02469", "02479", "01247",
+         "03458", "01258"),
+        #6
+        ("012345", "012346", "012356", "012456", "012367", "012567", "012678", "023457", "012357", "013457", "012457",
+         "012467", "013467", "013458", "012458", "014568", "012478", "012578", "013478", "014589", "023468", "012468",
+         "023568", "013468", "013568", "013578", "013469", "013569", "013689", "013679", "013589", "024579", "023579",
+         "013579", "02468A", "012347", "012348", "012378", "023458", "012358", "012368", "012369", "012568", "012569",
+         "023469", "012469", "012479", "012579", "013479", "014679"),
+        #7
+        ("0123456", "0123457", "0123458", "0123467", "0123567", "0123478", "0123678", "0234568", "0123468", "0123469",
+         "0134568", "0123479", "0124568", "0123578", "0124678", "0123569", "0124569", "0123589", "0123679", "0124789",
+         "0124589", "0125689", "0234579", "0123579", "0234679", "0134579", "0124579", "0135679", "0124679", "0124689",
+         "0134679", "0134689", "012468A", "013468A", "013568A", "0123568", "0134578", "0124578"),
+        #8
+        ("01234567", "01234568", "01234569", "01234578", "01234678", "01235678", "01234589", "01234789", "01236789",
+         "02345679", "01234579", "01345679", "01234679", "01245679", "01234689", "01235789", "01345689", "01235689",
+         "01245689", "01245789", "0123468A", "0123568A", "0123578A", "0124568A", "0124678A", "0124579A", "0124578A",
+         "0134679A", "01235679"),
+        #9
+        ("012345678", "012345679", "012345689", "012345789", "012346789", "01234568A", "01234578A", "01234678A",
+         "01235678A", "01234679A", "01235679A", "01245689A"),
+        #10
+        ("0123456789", "012345678A", "012345679A", "012345689A", "012345789A", "012346789A"),
+        #11
+        ("0123456789A",),
+        #12
+        ("0123456789AB",),
+    )
+
+    _set_class_table = None
+
+    @classmethod
+    def set_class_table(cls) -> set_class_table:
+        """
+        Returns the set class table, which is built on first use
+        """
+        if cls._set_class_table is None:
+            cls._set_class_table = cls.create_set_class_table()
+        return cls._set_class_table
+
+    @classmethod
+    def create_set_class_table(cls) -> set_class_table:
+        note_bits = combinatoriality.note_bits()
+        prime_form_notes = [[int(note, 12) for note in prime_form] for prime_forms in cls.forte_prime_forms for prime_form in prime_forms]
+        prime_forms = np.array([note_bits[notes].sum(dtype=np.uint16) for notes in prime_form_notes], dtype=np.uint16)
+
+        #every mask of a set class has the same smallest transposition or inversion
+        masks = np.arange(4096, dtype=np.uint16)
+        mask_bits = (masks[:, None] >> np.arange(12, dtype=np.uint16)) & 1
+        inverted_masks = (mask_bits[:, (-np.arange(12)) % 12] * note_bits).sum(axis=1, dtype=np.uint16)
+        transposed_masks = combinatoriality.transposed_masks()
+        smallest_forms = np.minimum(transposed_masks.min(axis=1), transposed_masks[inverted_masks].min(axis=1))
+        smallest_form_classes = np.full(4096, -1, dtype=np.int16)
+        smallest_form_classes[smallest_forms[prime_forms]] = np.arange(len(prime_forms))
+        class_indices = smallest_form_classes[smallest_forms]
+
+        prime_form_bits = mask_bits[prime_forms].astype(np.uint8)
+        interval_vectors = np.stack([(prime_form_bits * np.roll(prime_form_bits, -interval_class, axis=1)).sum(axis=1) for interval_class in range(1, 7)], axis=1).astype(np.uint8)
+        #the tritone is counted from both of its notes
+        interval_vectors[:, 5] //= 2
+        cardinalities = prime_form_bits.sum(axis=1)
+        same_vectors = (interval_vectors[:, None] == interval_vectors[None, :]).all(axis=2) & (cardinalities[:, None] == cardinalities[None, :])
+        np.fill_diagonal(same_vectors, False)
+        z_partners = np.where(same_vectors.any(axis=1), same_vectors.argmax(axis=1), -1).astype(np.int16)
+
+        forte_names = []
+        for cardinality, cardinality_prime_forms in enumerate(cls.forte_prime_forms):
+            for forte_number in range(1, len(cardinality_prime_forms) + 1):
+                z = "Z" if z_partners[len(forte_names)] >= 0 else ""
+                forte_names.append(f"{cardinality}-{z}{forte_number}")
+        return set_class_table(class_indices, np.array(forte_names), prime_forms, interval_vectors, z_partners)
+
+    @classmethod
+    def class_indices(cls, masks) -> np.ndarray:
+        """
+        Returns the set class(0-223) of every pitch-class mask in an array of any shape
+        """
+        masks = np.asarray(masks)
+        if masks.size > 0 and (masks.min() < 0 or masks.max() > 0xFFF):
+            raise ValueError("Every pitch-class mask must be between 0 and 4095")
+        return cls.set_class_table().class_indices[masks]
+
+    @classmethod
+    def classify_segments(cls, tone_rows: np.ndarray, segment_size: int) -> np.ndarray:
+        """
+        Returns the set class of every segment of one or more tone rows,
+        e.g. (N, 12) rows and segment_size = 3 -> (N, 4) int16 set classes of their trichords
+        """
+        return cls.set_class_table().class_indices[combinatoriality.segment_masks(tone_rows, segment_size)]
+
+    @classmethod
+    def forte_names(cls, masks) -> np.ndarray:
+        """
+        Returns the Forte name of every pitch-class mask
+        """
+        return cls.set_class_table().forte_names[cls.class_indices(masks)]
+
+    @classmethod
+    def prime_forms(cls, masks) -> np.ndarray:
+        """
+        Returns the prime form of every pitch-class mask, as a pitch-class mask
+        """
+        return cls.set_class_table().prime_forms[cls.class_indices(masks)]
+
+    @classmethod
+    def interval_vectors(cls, masks) -> np.ndarray:
+        """
+        Returns the interval-class vector of every pitch-class mask, with shape masks.shape + (6,)
+        """
+        return cls.set_class_table().interval_vectors[cls.class_indices(masks)]
+
+    @classmethod
+    def z_partners(cls, masks) -> np.ndarray:
+        """
+        Returns the Z-related set class of every pitch-class mask, -1 where the set class is not Z-related
+        """
+        return cls.set_class_table().z_partners[cls.class_indices(masks)]
+
+    @classmethod
+    def find_set_class(cls, forte_name: str) -> int:
+        """
+        Returns the set class index of a Forte name, e.g. "6-Z44"(the Z is optional)
+        """
+        forte_names = cls.set_class_table().forte_names
+        matches = np.flatnonzero((forte_names == forte_name) | (np.char.replace(forte_names, "Z", "") == forte_name))
+        if len(matches) == 0:
+            raise ValueError(f"Invalid Forte name({forte_name})")
+        return int(matches[0])
+
+    @classmethod
+    def prime_form_notes(cls, set_class: int) -> tuple:
+        """
+        Returns the notes of the prime form of a set class, e.g. (0, 1, 4) for set class 10(3-3)
+        """
+        prime_form = int(cls.set_class_table().prime_forms[set_class])
+        return tuple(note for note in range(12) if prime_form >> note & 1)
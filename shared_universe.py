@@ -0,0 +1,175 @@
+import math
+import numpy as np
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from database_entry_creator import permutation_calculator
+from tone_row import tone_row
+"""
+Builds the tone rows of a range of row numbers(and optionally all of their transformations)
+once in shared memory, so that every process of a multiprocessing pool can read them
+without calculating or unpickling its own copy.
+
+Arrays:
+- "P0": (N, 12) uint8, tone rows in row number order(see permutation_calculator.find_permutations())
+- "transformations": (N, 48, 12) uint8, ordered as in tone_row.transformation_names()
+
+Example:
+    with shared_universe(0, 1_000_000) as universe:
+        with multiprocessing.Pool(8, shared_universe.worker_initializer, (universe.descriptors,)) as pool:
+            pool.map(analyse_rows, ranges)
+
+    def analyse_rows(row_range):
+        tone_rows = shared_universe.worker_arrays()["P0"][row_range[0]:row_range[1]]
+
+Workers only receive the names of the shared memory blocks, the process that created
+the universe owns the memory and frees it when the universe is closed.
+"""
+@dataclass(frozen=True)
+class shared_array_descriptor:
+    """
+    Everything a process needs to attach to an array in shared memory
+    """
+    memory_name: str
+    shape: tuple
+    dtype: str
+
+    def attach(self):
+        """
+        Returns (array, shared memory block). The array is a view of the shared memory,
+        so the block must stay referenced(and open) while the array is used.
+        """
+        memory = shared_memory.SharedMemory(name=self.memory_name)
+        return np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=memory.buf), memory
+
+
+class shared_universe():
+
+    _worker_universe = None
+
+    def __init__(self, first_row_number = 0, last_row_number = None, row_length = 12, fix_first_note = False, include_transformations = True, batch_size = 65_536):
+        """
+        Creates the shared arrays and fills them in batches of batch_size rows.\n
+
+        last_row_number defaults to the size of the universe: row_length!
+        (or (row_length - 1)! if fix_first_note = True).
+        include_transformations requires row_length = 12.
+        """
+        universe_size = math.factorial(row_length - 1 if fix_first_note else row_length)
+        if last_row_number is None:
+            last_row_number = universe_size
+        if first_row_number < 0 or last_row_number > universe_size or first_row_number >= last_row_number:
+            raise ValueError(f"Invalid row range({first_row_number}, {last_row_number})")
+        if include_transformations and row_length != 12:
+            raise ValueError("Transformations can only be included for tone rows of length 12")
+
+        self.__first_row_number = first_row_number
+        self.__memory_blocks = []
+        self.__arrays = {}
+        row_count = last_row_number - first_row_number
+        try:
+            self.__create_array("P0", (row_count, row_length))
+            if include_transformations:
+                self.__create_array("transformations", (row_count, 48, 12))
+            for batch_start in range(first_row_number, last_row_number, batch_size):
+                batch_stop = min(batch_start + batch_size, last_row_number)
+                tone_rows = permutation_calculator.find_permutations(np.arange(batch_start, batch_stop), row_length, fix_first_note)
+                self.__arrays["P0"][batch_start - first_row_number:batch_stop - first_row_number] = tone_rows
+                if include_transformations:
+                    self.__arrays["transformations"][batch_start - first_row_number:batch_stop - first_row_number] = tone_row.all_transformations(tone_rows)
+        except BaseException:
+            self.close()
+            raise
+
+    def __create_array(self, array_name: str, shape: tuple):
+        memory = shared_memory.SharedMemory(create=True, size=max(math.prod(shape), 1))
+        self.__memory_blocks.append(memory)
+        self.__arrays[array_name] = np.ndarray(shape, dtype=np.uint8, buffer=memory.buf)
+
+    @property
+    def first_row_number(self) -> int:
+        return self.__first_row_number
+
+    @property
+    def arrays(self) -> dict:
+        """
+        {array name : array} in the memory of the creating process
+        """
+        return self.__arrays
+
+    @property
+    def descriptors(self) -> dict:
+        """
+        {array name : shared_array_descriptor}, which can be sent to other processes
+        """
+        return {
+            array_name: shared_array_descriptor(memory.name, array.shape, array.dtype.str)
+            for (array_name, array), memory in zip(self.__arrays.items(), self.__memory_blocks)
+        }
+
+    def close(self):
+        """
+        Frees the shared memory. Processes that are still attached keep their views
+        until they close them.
+        """
+        self.__arrays = {}
+        for memory in self.__memory_blocks:
+            memory.close()
+            memory.unlink()
+        self.__memory_blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @classmethod
+    def attach(cls, descriptors: dict) -> "attached_universe":
+        """
+        Returns zero-copy views of the arrays of a universe created in another process
+        """
+        return attached_universe(descriptors)
+
+    @classmethod
+    def worker_initializer(cls, descriptors: dict):
+        """
+        Initializer for multiprocessing.Pool / ProcessPoolExecutor that attaches
+        every worker to the universe once.
+        """
+        cls._worker_universe = attached_universe(descriptors)
+
+    @classmethod
+    def worker_arrays(cls) -> dict:
+        """
+        Returns {array name : array} inside a worker started with worker_initializer()
+        """
+        if cls._worker_universe is None:
+            raise ValueError("This process is not attached to a shared universe(see shared_universe.worker_initializer)")
+        return cls._worker_universe.arrays
+
+
+class attached_universe():
+
+    def __init__(self, descriptors: dict):
+        self.__memory_blocks = []
+        self.__arrays = {}
+        for array_name, descriptor in descriptors.items():
+            array, memory = descriptor.attach()
+            self.__arrays[array_name] = array
+            self.__memory_blocks.append(memory)
+
+    @property
+    def arrays(self) -> dict:
+        return self.__arrays
+
+    def close(self):
+        self.__arrays = {}
+        for memory in self.__memory_blocks:
+            memory.close()
+        self.__memory_blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
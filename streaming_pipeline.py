@@ -0,0 +1,300 @@
+import itertools
+import queue
+import threading
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass
+from database_entry_creator import permutation_calculator
+from tone_row import tone_row
+from combinatoriality import combinatoriality
+from numpy_shards import numpy_shard_writer
+from note_name_parser import note_name_parser
+"""
+Streaming pipeline for analysing any range of row numbers(or a file of tone rows) in constant memory.
+
+Data moves through the pipeline as chunks: {column name : array} where every array holds
+the same number of rows(at most chunk_size). Column names follow create_database_entry.all_values_columns(),
+e.g. "row_number", "P0", "R0", "P0_intervals", "combinatorial_hexachords".
+
+source -> [queue] -> stage -> [queue] -> stage -> ... -> [queue] -> sink
+
+Every stage runs in its own thread and the queues between stages are bounded, so a slow stage
+holds back the stages before it instead of letting chunks pile up in memory. A stage may also
+process several chunks at once in a thread or process pool, in which case chunks still leave
+the stage in their original order.
+
+Example:
+    streaming_pipeline.run(
+        streaming_pipeline.rank_source(0, 1_000_000),
+        [pipeline_stage(prime_transformation_stage()),
+         pipeline_stage(combinatoriality_stage(), workers=4, executor="process")],
+        shard_sink("./shards"))
+"""
+@dataclass
+class pipeline_stage:
+    function: object #chunk -> chunk, returning None drops the chunk
+    workers: int = 0 #0 processes chunks in the stage's thread
+    executor: str = "thread" #"thread" or "process"(function must be picklable)
+    queue_size: int = 4 #maximum number of chunks waiting for this stage
+
+
+class streaming_pipeline():
+
+    @classmethod
+    def rank_source(cls, first_row_number: int, last_row_number: int, chunk_size = 65_536, row_length = 12):
+        """
+        Yields chunks of {"row_number", "P0"} for every row number in [first_row_number, last_row_number)
+        (see permutation_calculator.find_permutations())
+        """
+        for chunk_start in range(first_row_number, last_row_number, chunk_size):
+            row_numbers = np.arange(chunk_start, min(chunk_start + chunk_size, last_row_number), dtype=np.int64)
+            yield {"row_number": row_numbers.astype(np.uint64), "P0": permutation_calculator.find_permutations(row_numbers, row_length)}
+
+    @classmethod
+    def file_source(cls, file_path: str, chunk_size = 65_536):
+        """
+        Yields chunks of {"P0"} from a text file with one tone row per line,
+        written as twelve note numbers separated by spaces or commas.\n
+
+        Empty lines and lines starting with '#' are skipped.
+        """
+        with open(file_path) as row_file:
+            lines = (line for line in row_file if line.strip() and not line.lstrip().startswith("#"))
+            while True:
+                chunk_lines = list(itertools.islice(lines, chunk_size))
+                if len(chunk_lines) == 0:
+                    return
+                notes = " ".join(chunk_lines).replace(",", " ").split()
+                if len(notes) != 12 * len(chunk_lines):
+                    raise ValueError(f"Every line of '{file_path}' should contain twelve note numbers")
+                yield {"P0": np.array(notes, dtype=np.uint8).reshape(-1, 12)}
+
+    @classmethod
+    def note_name_source(cls, file_path: str, chunk_size = 65_536, errors = None, on_error = None):
+        """
+        Yields chunks of {"P0"} from a text file with one tone row of note names per line
+        (e.g. "C C# D Eb E F F# G Ab A Bb B", see note_name_parser.parse_rows()).\n
+
+        Invalid lines are skipped and reported through errors/on_error.
+        """
+        for tone_rows in note_name_parser.parse_rows(file_path, chunk_size, errors, on_error):
+            yield {"P0": tone_rows}
+
+    @classmethod
+    def stream(cls, source, stages: list):
+        """
+        Yields the chunks that leave the last stage of the pipeline.\n
+
+        Closing the generator early stops all stages.
+        Exceptions raised by the source or a stage are raised here.
+        """
+        stop_event = threading.Event()
+        input_queue = queue.Queue(stages[0].queue_size if stages else 4)
+        threads = [threading.Thread(target=cls.feed_source, args=(source, input_queue, stop_event), daemon=True)]
+        for stage in stages:
+            output_queue = queue.Queue(stage.queue_size)
+            threads.append(threading.Thread(target=cls.run_stage, args=(stage, input_queue, output_queue, stop_event), daemon=True))
+            input_queue = output_queue
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                chunk = input_queue.get()
+                if chunk is _end_of_stream:
+                    return
+                if isinstance(chunk, _stage_error):
+                    raise chunk.error
+                yield chunk
+        finally:
+            stop_event.set()
+            for thread in threads:
+                thread.join()
+
+    @classmethod
+    def run(cls, source, stages: list, sink = None) -> int:
+        """
+        Runs the pipeline until the source is exhausted and passes every resulting chunk to sink(chunk).\n
+
+        Returns the number of rows that reached the sink.
+        """
+        row_count = 0
+        for chunk in cls.stream(source, stages):
+            row_count += len(next(iter(chunk.values())))
+            if sink is not None:
+                sink(chunk)
+        return row_count
+
+    @classmethod
+    def feed_source(cls, source, output_queue: queue.Queue, stop_event: threading.Event):
+        try:
+            for chunk in source:
+                if cls.put(output_queue, chunk, stop_event) == False:
+                    return
+            cls.put(output_queue, _end_of_stream, stop_event)
+        except Exception as error:
+            cls.put(output_queue, _stage_error(error), stop_event)
+
+    @classmethod
+    def run_stage(cls, stage: pipeline_stage, input_queue: queue.Queue, output_queue: queue.Queue, stop_event: threading.Event):
+        """
+        Moves chunks from input_queue to output_queue through stage.function.
+        With workers > 0, up to workers chunks are processed at once.
+        """
+        executor = None
+        if stage.workers > 0:
+            executor = (ProcessPoolExecutor if stage.executor == "process" else ThreadPoolExecutor)(stage.workers)
+        pending_chunks = deque()
+        try:
+            while True:
+                chunk = cls.get(input_queue, stop_event)
+                if chunk is None:
+                    return
+                if chunk is _end_of_stream or isinstance(chunk, _stage_error):
+                    while pending_chunks:
+                        if cls.put_result(output_queue, pending_chunks.popleft().result(), stop_event) == False:
+                            return
+                    cls.put(output_queue, chunk, stop_event)
+                    return
+                if executor is None:
+                    if cls.put_result(output_queue, stage.function(chunk), stop_event) == False:
+                        return
+                    continue
+                pending_chunks.append(executor.submit(stage.function, chunk))
+                if len(pending_chunks) >= stage.workers:
+                    if cls.put_result(output_queue, pending_chunks.popleft().result(), stop_event) == False:
+                        return
+        except Exception as error:
+            cls.put(output_queue, _stage_error(error), stop_event)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    @classmethod
+    def put_result(cls, output_queue: queue.Queue, chunk, stop_event: threading.Event) -> bool:
+        if chunk is None:
+            return True
+        return cls.put(output_queue, chunk, stop_event)
+
+    @classmethod
+    def put(cls, output_queue: queue.Queue, item, stop_event: threading.Event) -> bool:
+        """
+        Waits for space in a queue. Returns False if the pipeline was stopped while waiting.
+        """
+        while stop_event.is_set() == False:
+            try:
+                output_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    @classmethod
+    def get(cls, input_queue: queue.Queue, stop_event: threading.Event):
+        """
+        Waits for an item in a queue. Returns None if the pipeline was stopped while waiting.
+        """
+        while stop_event.is_set() == False:
+            try:
+                return input_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return None
+
+
+class _end_of_stream():
+    pass
+
+
+@dataclass
+class _stage_error:
+    error: Exception
+
+
+#Stage functions are classes so that they can be sent to process pools.
+class prime_transformation_stage():
+    """
+    Adds "R0", "I0" and "RI0" to a chunk
+    """
+    def __call__(self, chunk: dict) -> dict:
+        prime_transformations = tone_row.prime_transformations_array(chunk["P0"])
+        return {**chunk, "R0": prime_transformations[:, 1], "I0": prime_transformations[:, 2], "RI0": prime_transformations[:, 3]}
+
+
+class all_transformations_stage():
+    """
+    Adds "transformations"(N * 48 * 12, see tone_row.all_transformations()) to a chunk
+    """
+    def __call__(self, chunk: dict) -> dict:
+        return {**chunk, "transformations": tone_row.all_transformations(chunk["P0"])}
+
+
+class interval_stage():
+    """
+    Adds "<name>_intervals" for every prime transformation in the chunk
+    """
+    def __call__(self, chunk: dict) -> dict:
+        intervals = {
+            f"{name}_intervals": tone_row.row_interval_sizes(chunk[name]).astype(np.int8)
+            for name in ("P0", "R0", "I0", "RI0") if name in chunk
+        }
+        return {**chunk, **intervals}
+
+
+class combinatoriality_stage():
+    """
+    Adds combinatorial bitmasks(see combinatoriality.combinatorial_masks()) to a chunk
+    """
+    column_names = {6: "combinatorial_hexachords", 4: "combinatorial_tetrachords", 3: "combinatorial_trichords"}
+
+    def __init__(self, segment_sizes = (6, 4, 3)):
+        self.segment_sizes = segment_sizes
+
+    def __call__(self, chunk: dict) -> dict:
+        masks = {self.column_names[size]: combinatoriality.combinatorial_masks(chunk["P0"], size) for size in self.segment_sizes}
+        return {**chunk, **masks}
+
+
+class filter_stage():
+    """
+    Keeps the rows for which predicate(chunk) returns True, e.g.
+    filter_stage(lambda chunk: chunk["combinatorial_hexachords"] != 0)\n
+
+    Chunks without remaining rows are dropped.
+    """
+    def __init__(self, predicate):
+        self.predicate = predicate
+
+    def __call__(self, chunk: dict):
+        keep = np.asarray(self.predicate(chunk), dtype=bool)
+        if keep.any() == False:
+            return None
+        return {name: column[keep] for name, column in chunk.items()}
+
+
+class shard_sink():
+    """
+    Writes every chunk as a shard(see numpy_shard_writer.append_shard())
+    """
+    def __init__(self, directory: str, compressed = True, columns = None):
+        self.directory = directory
+        self.compressed = compressed
+        self.columns = columns
+
+    def __call__(self, chunk: dict):
+        if self.columns is not None:
+            chunk = {name: chunk[name] for name in self.columns}
+        numpy_shard_writer.append_shard(self.directory, chunk, self.compressed)
+
+
+class text_sink():
+    """
+    Writes the tone rows of a column to a text file, one row per line
+    """
+    def __init__(self, text_file, column = "P0"):
+        self.text_file = text_file
+        self.column = column
+
+    def __call__(self, chunk: dict):
+        np.savetxt(self.text_file, chunk[self.column], fmt="%d")
@@ -2,6 +2,7 @@
 import unittest
 import numpy as np
 import math
+import tempfile
 from tone_row import tone_row
 #from music_xml_writer import music_xml_writer
 from note_names import note_names
@@ -9,6 +10,40 @@ from intervals import intervals
 from combinatoriality import combinatoriality
 from twelve_tone_matrix import twelve_tone_matrix
 from database_permutation_writer import permutation_calculator
+from database_entry_creator import create_database_entry
+import database_entry_creator
+from numpy_shards import numpy_shard_writer, numpy_shard_reader
+from database_verifier import database_verifier
+from twelvetone_database_creator import tone_row_permutations
+import os
+import sqlite3
+from shared_universe import shared_universe
+from universe_scanner import universe_scanner, scan_cancelled
+import operator
+import re
+import io
+import importlib.util
+from music_xml_template_writer import music_xml_template_writer
+from batch_report_writer import batch_report_writer
+from report_cache import report_cache
+from catalogue_score_writer import catalogue_score_writer
+from midi_writer import midi_writer
+from note_name_parser import note_name_parser
+from random_rows import random_rows
+from combinatorial_sampler import combinatorial_sampler
+from row_search import row_search
+from set_classes import set_classes
+from segment_census import segment_census
+from interval_analytics import interval_analytics
+from form_positions import form_positions
+from segment_invariance import segment_invariance
+from combinatorial_arrays import combinatorial_arrays
+import itertools
+import zipfile
+import subprocess
+import sys
+import xml.etree.ElementTree as ElementTree
+from streaming_pipeline import streaming_pipeline, pipeline_stage, prime_transformation_stage, combinatoriality_stage, filter_stage, shard_sink
 
 
 class test_tone_row(unittest.TestCase):
@@ -50,7 +85,239 @@ class test_tone_row(unittest.TestCase):
     def test_row_interval_sizes(self):
         tc_interval_sizes = np.ones(11, dtype=int)
         self.assertTrue(np.array_equal(tone_row.row_interval_sizes(np.arange(12)), tc_interval_sizes))
+        self.assertTrue(np.array_equal(tone_row.row_interval_sizes(np.array([2, 5, 1, 6, 7, 9, 4, 11, 10, 3, 8, 0])), np.array([3, -4, 5, 1, 2, -5, -5, -1, 5, 5, 4])))
     
+    def test_all_transformations(self):
+        prime_row = np.array([2, 5, 1, 6, 7, 9, 4, 11, 10, 3, 8, 0])
+        transformations = tone_row.all_transformations(prime_row)
+        for name, transformation in zip(tone_row.transformation_names(), transformations):
+            self.assertTrue(np.array_equal(transformation, tone_row.get_transformation(prime_row, name)))
+        self.assertEqual(tone_row.all_transformations(np.array([prime_row, prime_row])).shape, (2, 48, 12))
+    
+    def test_validate_rows(self):
+        tone_rows = np.array([np.arange(12), np.zeros(12), np.arange(1, 13), [2, 5, 1, 6, 7, 9, 4, 11, 10, 3, 8, 0], np.arange(12) - 1])
+        self.assertEqual(tone_row.validate_rows(tone_rows).tolist(), [True, False, False, True, False])
+        self.assertEqual(tone_row.validate_rows(tone_rows.reshape(1, 5, 12)).shape, (1, 5))
+        with self.assertRaisesRegex(ValueError, "3 invalid tone rows at indices: 1, 2, 4"):
+            tone_row.validate_rows(tone_rows, raise_error=True)
+        #rows without note 0 were accepted before the bitmask check
+        for invalid_row in ([1] * 12, [0] * 12, list(range(1, 13))):
+            with self.assertRaises(ValueError):
+                tone_row.validate_row(np.array(invalid_row))
+        tone_row.validate_row(np.arange(12)[::-1])
+
+class test_random_rows(unittest.TestCase):
+    
+    def test_generate_rows(self):
+        tone_rows = random_rows.generate_rows(12_000, random_generator=7)
+        self.assertEqual((tone_rows.shape, tone_rows.dtype), ((12_000, 12), np.uint8))
+        self.assertTrue(tone_row.validate_rows(tone_rows).all())
+        self.assertTrue(np.array_equal(tone_rows, random_rows.generate_rows(12_000, random_generator=7)))
+        #every note appears about equally often at every position
+        note_counts = np.stack([np.bincount(tone_rows[:, position], minlength=12) for position in range(12)])
+        self.assertTrue((np.abs(note_counts - 1000) < 150).all())
+        fixed_rows = random_rows.generate_rows(100, np.random.default_rng(1), fix_first_note=True)
+        self.assertTrue((fixed_rows[:, 0] == 0).all() and tone_row.validate_rows(fixed_rows).all())
+    
+    def test_row_numbers_and_streams(self):
+        row_numbers = np.concatenate(list(random_rows.iter_rows(1000, block_size=300, random_generator=3, fix_first_note=True, row_numbers=True)))
+        self.assertEqual(len(row_numbers), 1000)
+        self.assertTrue(((row_numbers >= 0) & (row_numbers < math.factorial(11))).all())
+        first_generator, second_generator = random_rows.spawn_generators(5, 2)
+        self.assertFalse(np.array_equal(random_rows.generate_rows(10, first_generator), random_rows.generate_rows(10, second_generator)))
+        self.assertTrue(np.array_equal(random_rows.generate_rows(10, random_rows.spawn_generators(5, 2)[1]), random_rows.generate_rows(10, random_rows.spawn_generators(np.random.SeedSequence(5), 2)[1])))
+
+class test_combinatorial_sampler(unittest.TestCase):
+    
+    def test_sample_rows(self):
+        transformation_names = tone_row.transformation_names()
+        required_mask = np.uint64((1 << transformation_names.index("I5")) | (1 << transformation_names.index("RI0")))
+        tone_rows = combinatorial_sampler.sample_rows(5000, ["I5", "RI0"], 6, random_generator=2)
+        self.assertTrue(tone_row.validate_rows(tone_rows).all())
+        masks = combinatoriality.combinatorial_masks(tone_rows, 6)
+        self.assertTrue(((masks & required_mask) == required_mask).all())
+        self.assertTrue(np.array_equal(tone_rows, combinatorial_sampler.sample_rows(5000, ["I5", "RI0"], 6, random_generator=2)))
+        exact_rows = combinatorial_sampler.sample_rows(1000, masks[0], 6, random_generator=3, exact=True)
+        self.assertTrue((combinatoriality.combinatorial_masks(exact_rows, 6) == masks[0]).all())
+        fixed_rows = combinatorial_sampler.sample_rows(1000, ["I5"], 6, random_generator=4, fix_first_note=True)
+        self.assertTrue((fixed_rows[:, 0] == 0).all() and tone_row.validate_rows(fixed_rows).all())
+    
+    def test_count_rows(self):
+        self.assertEqual(combinatorial_sampler.count_rows(["I5"], 6), 10_368_000)
+        self.assertEqual(combinatorial_sampler.count_rows(["R6"], 6), 2_073_600)
+        self.assertEqual(combinatorial_sampler.count_rows([], 6), math.factorial(12))
+        for segment_size in (6, 4, 3):
+            empty_rows = combinatorial_sampler.sample_rows(0, [], segment_size, random_generator=5)
+            self.assertEqual((empty_rows.shape, empty_rows.dtype), ((0, 12), np.uint8))
+        with self.assertRaises(ValueError):
+            combinatorial_sampler.sample_rows(10, ["X1"], 6)
+
+
+class test_row_search(unittest.TestCase):
+    
+    def test_all_interval_rows(self):
+        tone_rows = row_search.find_rows(all_interval=True)
+        self.assertEqual(len(tone_rows), 3856)
+        self.assertTrue(tone_row.validate_rows(tone_rows).all() and (tone_rows[:, 0] == 0).all())
+        interval_masks = (1 << (np.diff(tone_rows.astype(int), axis=1) % 12)).sum(axis=1)
+        self.assertTrue((interval_masks == 0xFFE).all())
+        #rows are yielded in ascending order, in blocks of at most block_size rows
+        self.assertTrue((np.lexsort(tone_rows.T[::-1]) == np.arange(len(tone_rows))).all())
+        blocks = list(row_search.search_rows(all_interval=True, block_size=1000, limit=2500))
+        self.assertEqual([len(block) for block in blocks], [1000, 1000, 500])
+        self.assertTrue(np.array_equal(np.concatenate(blocks), tone_rows[:2500]))
+    
+    def test_segments_and_combinatorials(self):
+        derived_rows = row_search.find_rows(segment_size=3, segments=row_search.segment_forms([0, 1, 4]))
+        self.assertTrue(len(derived_rows) > 0 and tone_row.validate_rows(derived_rows).all())
+        allowed_masks = set(combinatoriality.note_bits()[row_search.segment_forms([0, 1, 4])].sum(axis=1).tolist())
+        self.assertTrue(set(combinatoriality.segment_masks(derived_rows, 3).ravel().tolist()) <= allowed_masks)
+        combinatorial_rows = row_search.find_rows(combinatorials=["I5", "RI0"])
+        self.assertEqual(len(combinatorial_rows), combinatorial_sampler.count_rows(["I5", "RI0"], 6, fix_first_note=True))
+        required_mask = np.uint64(combinatoriality.transformations_to_mask(["I5", "RI0"]))
+        self.assertTrue(((combinatoriality.combinatorial_masks(combinatorial_rows, 6) & required_mask) == required_mask).all())
+        with self.assertRaises(ValueError):
+            row_search.find_rows(intervals=[0, 1])
+
+
+class test_set_classes(unittest.TestCase):
+    
+    def test_set_class_table(self):
+        table = set_classes.set_class_table()
+        self.assertEqual(len(table.forte_names), 224)
+        self.assertTrue((table.class_indices >= 0).all())
+        #{0, 1, 4} and its inversion {0, 3, 4} are both 3-3
+        self.assertEqual(list(set_classes.forte_names([0b10011, 0b11001])), ["3-3", "3-3"])
+        self.assertEqual(set_classes.prime_form_notes(set_classes.find_set_class("3-3")), (0, 1, 4))
+        self.assertEqual(list(set_classes.interval_vectors(0b10011)), [1, 0, 1, 1, 0, 0])
+        self.assertEqual(table.forte_names[set_classes.z_partners(table.prime_forms[set_classes.find_set_class("4-Z15")])], "4-Z29")
+        self.assertEqual(set_classes.z_partners(0b111), -1)
+        with self.assertRaises(ValueError):
+            set_classes.forte_names(4096)
+    
+    def test_classify_segments(self):
+        tone_rows = np.array([[0, 1, 4, 2, 3, 7, 5, 6, 10, 8, 9, 11], np.arange(12)])
+        forte_names = set_classes.set_class_table().forte_names
+        self.assertEqual(forte_names[set_classes.classify_segments(tone_rows, 3)].tolist(), [["3-3", "3-4", "3-4", "3-2"], ["3-1"] * 4])
+        self.assertEqual(forte_names[set_classes.classify_segments(tone_rows, 6)].tolist(), [["6-Z36", "6-Z3"], ["6-1", "6-1"]])
+
+
+class test_segment_census(unittest.TestCase):
+    
+    def test_census(self):
+        with tempfile.TemporaryDirectory() as directory:
+            census = segment_census.census(directory, workers=0, first_row_number=5000, last_row_number=80_000)
+            tone_rows = database_entry_creator.permutation_calculator.find_permutations(np.arange(5000, 80_000), 12, True)
+            trichord_masks = combinatoriality.segment_masks(tone_rows, 3)
+            for position in range(4):
+                self.assertTrue(np.array_equal(census[3][position], np.bincount(trichord_masks[:, position], minlength=4096)))
+            #the saved census is loaded instead of scanning the universe again
+            forte_names = set_classes.set_class_table().forte_names
+            hexachord_classes = set_classes.classify_segments(tone_rows, 6)
+            class_counts = segment_census.set_class_counts(6, directory=directory, first_row_number=5000, last_row_number=80_000, cancel=lambda: True)
+            self.assertTrue(np.array_equal(class_counts[1], np.bincount(hexachord_classes[:, 1], minlength=len(forte_names))))
+            self.assertEqual(segment_census.count_rows("6-Z44", 6, 0, fix_first=False, directory=directory, first_row_number=5000, last_row_number=80_000, cancel=lambda: True),
+                             12 * np.count_nonzero(forte_names[hexachord_classes[:, 0]] == "6-Z44"))
+            all_mask_counts = segment_census.mask_counts(4, fix_first=False, directory=directory, first_row_number=5000, last_row_number=80_000)
+            self.assertTrue((all_mask_counts.sum(axis=1) == 12 * len(tone_rows)).all())
+
+
+class test_interval_analytics(unittest.TestCase):
+    
+    def test_intervals(self):
+        tone_rows = random_rows.generate_rows(1000, random_generator=11)
+        intervals = interval_analytics.interval_sequences(tone_rows)
+        self.assertEqual((intervals.shape, intervals.dtype), ((1000, 11), np.uint8))
+        self.assertTrue(np.array_equal(intervals, np.diff(tone_rows.astype(int), axis=1) % 12))
+        self.assertTrue(np.array_equal(interval_analytics.directed_intervals(tone_rows), tone_row.row_interval_sizes(tone_rows)))
+        counts = interval_analytics.interval_class_counts(tone_rows)
+        self.assertEqual((counts.shape, counts.dtype), ((1000, 6), np.uint8))
+        self.assertTrue((counts.sum(axis=1) == 11).all())
+        self.assertEqual(list(interval_analytics.interval_class_counts([0, 7, 2, 9, 4, 11, 6, 1, 8, 3, 10, 5])), [0, 0, 0, 0, 11, 0])
+    
+    def test_row_flags(self):
+        tone_rows = np.array([np.arange(12), [0, 1, 2, 3, 4, 5, 11, 10, 9, 8, 7, 6], [0, 1, 3, 2, 7, 10, 8, 4, 11, 5, 9, 6]])
+        analysis = interval_analytics.analyze(tone_rows)
+        self.assertEqual(analysis.palindromic.tolist(), [True, False, False])
+        self.assertEqual(analysis.retrograde_symmetric.tolist(), [False, True, False])
+        self.assertEqual(analysis.all_interval.tolist(), [False, False, True])
+        self.assertTrue(interval_analytics.is_all_interval(row_search.find_rows(all_interval=True)).all())
+
+
+class test_form_positions(unittest.TestCase):
+    
+    def test_positions(self):
+        prime_rows = random_rows.generate_rows(50, random_generator=12)
+        forms = tone_row.all_transformations(prime_rows)
+        positions = form_positions.all_form_positions(prime_rows)
+        self.assertEqual((positions.shape, positions.dtype), ((50, 48, 12), np.uint8))
+        self.assertTrue((np.take_along_axis(forms, positions.astype(np.intp), axis=-1) == np.arange(12)).all())
+        self.assertTrue(np.array_equal(form_positions.segment_positions(positions, [7])[..., 0], np.argmax(forms == 7, axis=-1)))
+    
+    def test_segment_queries(self):
+        prime_rows = random_rows.generate_rows(20, random_generator=13)
+        forms = tone_row.all_transformations(prime_rows)
+        positions = form_positions.all_form_positions(prime_rows)
+        expected_dyads = [[any(form[i] == 3 and form[i + 1] == 9 for i in range(11)) for form in row_forms] for row_forms in forms]
+        self.assertTrue(np.array_equal(form_positions.contains_ordered_segment(positions, [3, 9]), expected_dyads))
+        self.assertTrue(np.array_equal(form_positions.contains_dyad(positions, 3, 9), expected_dyads))
+        expected_trichords = [[set(form[:3].tolist()) == {1, 2, 5} for form in row_forms] for row_forms in forms]
+        self.assertTrue(np.array_equal(form_positions.contains_unordered_segment(positions, [1, 2, 5], start=0), expected_trichords))
+        chromatic_forms = tone_row.all_transformations(np.arange(12))
+        shared_dyads = form_positions.shared_dyad_counts(chromatic_forms, form_positions.positions(np.arange(12)))
+        self.assertEqual(shared_dyads[:13].tolist(), [11] + [10] * 11 + [0])
+
+
+class test_segment_invariance(unittest.TestCase):
+    
+    def test_invariance_matrices(self):
+        prime_rows = random_rows.generate_rows(20, random_generator=14)
+        invariant_segments = segment_invariance.invariance_matrices(prime_rows, 3)
+        self.assertEqual(invariant_segments.shape, (20, 48, 48, 4))
+        forms = tone_row.all_transformations(prime_rows[0])
+        expected = [[[set(forms[a][j:j + 3]) == set(forms[b][j:j + 3]) for j in range(0, 12, 3)] for b in range(48)] for a in range(48)]
+        self.assertTrue(np.array_equal(invariant_segments[0], expected))
+        #forms with the hexachords of P0 are its hexachordal combinatorials
+        hexachord_matches = segment_invariance.invariance_matrices(prime_rows, 6)[:, 0].all(axis=-1)
+        hexachord_matches[:, 0] = False
+        self.assertTrue(np.array_equal(combinatoriality.pack_transformation_bits(hexachord_matches), combinatoriality.combinatorial_masks(prime_rows, 6)))
+        self.assertEqual(segment_invariance.invariant_pairs(np.arange(12), 6)[:3], [("P0", "R5"), ("P0", "I5"), ("P0", "RI0")])
+    
+    def test_shared_dyads(self):
+        prime_rows = random_rows.generate_rows(5, random_generator=15)
+        shared_dyads = segment_invariance.shared_dyad_matrices(prime_rows)
+        same_position_dyads = segment_invariance.shared_dyad_matrices(prime_rows, same_positions=True)
+        forms = tone_row.all_transformations(prime_rows[1]).tolist()
+        dyads = [set(zip(form[:-1], form[1:])) for form in forms]
+        self.assertTrue(np.array_equal(shared_dyads[1], [[len(dyads[a] & dyads[b]) for b in range(48)] for a in range(48)]))
+        self.assertTrue(np.array_equal(same_position_dyads[1], [[len(set(zip(forms[a][:-1], forms[a][1:], range(11))) & set(zip(forms[b][:-1], forms[b][1:], range(11)))) for b in range(48)] for a in range(48)]))
+        self.assertTrue((np.diagonal(shared_dyads, axis1=1, axis2=2) == 11).all())
+
+
+class test_combinatorial_arrays(unittest.TestCase):
+    
+    def test_find_arrays(self):
+        for prime_row in (np.arange(12), random_rows.generate_rows(1, random_generator=16)[0]):
+            segment_masks = combinatoriality.segment_masks(tone_row.all_transformations(prime_row), 4)
+            expected = [forms for forms in itertools.combinations(range(48), 3) if (segment_masks[list(forms)].sum(axis=0) == 0xFFF).all()
+                        and (np.bitwise_or.reduce(segment_masks[list(forms)], axis=0) == 0xFFF).all()]
+            arrays = combinatorial_arrays.find_arrays(prime_row, 4)
+            self.assertEqual([tuple(array) for array in arrays.tolist()], expected)
+        arrays = combinatorial_arrays.find_arrays(np.arange(12), 4, required_forms=["P0"])
+        self.assertEqual(combinatorial_arrays.form_names(arrays), [["P0", "P4", "P8"], ["P0", "P4", "RI8"], ["P0", "P8", "RI4"], ["P0", "RI4", "RI8"]])
+        array_forms = combinatorial_arrays.array_forms(np.arange(12), arrays)
+        self.assertTrue((np.sort(array_forms[:, :, :4].reshape(-1, 12), axis=1) == np.arange(12)).all())
+    
+    def test_limits_and_streaming(self):
+        arrays = combinatorial_arrays.find_arrays(np.arange(12), 3)
+        blocks = list(combinatorial_arrays.search_arrays(np.arange(12), 3, block_size=50, limit=120))
+        self.assertEqual([len(block) for block in blocks], [50, 50, 20])
+        self.assertTrue(np.array_equal(np.concatenate(blocks), arrays[:120]))
+        self.assertEqual(combinatorial_arrays.count_arrays(np.arange(12), 3, forms=["P0", "P3", "P6", "P9"]), 1)
+        with self.assertRaises(ValueError):
+            combinatorial_arrays.find_arrays(np.arange(12), 5)
+
+
 class test_twelve_tone_matrix(unittest.TestCase):
     
     def test_matrix(self):
@@ -98,6 +365,15 @@ class test_intervals(unittest.TestCase):
     
     def test_get_transposed_note(self):
         self.assertEqual(intervals.get_transposed_note("A#", "m7", "down"), "B#")
+        self.assertEqual(intervals.get_transposed_note("C", "M2", "down"), "Bb")
+        self.assertIsNone(intervals.get_transposed_note("C", "P2", "up"))
+    
+    def test_batch_intervals(self):
+        self.assertEqual(intervals.note_interval_names(["C", "A##"], [["up"], ["down"]], ["F#", "E##"]).tolist(), [["A4", "P5"], ["d5", "P4"]])
+        #B## up to Cbb has no interval name
+        self.assertEqual(intervals.note_interval_names(["C", "B##"], "up", ["F#", "Cbb"]).tolist(), ["A4", None])
+        transposed_notes = intervals.get_transposed_notes(np.array([["C", "A#"], ["E", "G"]]), "M2", "up")
+        self.assertEqual(transposed_notes.tolist(), [["D", "B#"], ["F#", "A"]])
 
 class test_combinatoriality(unittest.TestCase):
     
@@ -110,12 +386,64 @@ class test_combinatoriality(unittest.TestCase):
         prime_row = [10, 8, 0, 9, 4, 6, 3, 7, 1, 5, 11, 2]
         self.assertEqual(combinatoriality.find_hexachordal_combinatorials(prime_row), ['RI11'])
     
+    def test_find_hexachordal_combinatorials_keeps_prime_row(self):
+        prime_row = np.array([5, 3, 1, 0, 2, 4, 6, 7, 8, 9, 10, 11])
+        combinatoriality.find_hexachordal_combinatorials(prime_row)
+        self.assertTrue(np.array_equal(prime_row, np.array([5, 3, 1, 0, 2, 4, 6, 7, 8, 9, 10, 11])))
+    
+    def test_combinatorial_masks(self):
+        prime_rows = database_entry_creator.permutation_calculator.find_permutations(np.arange(3000000, 3000200))
+        prime_rows = np.vstack([np.arange(12), prime_rows])
+        finders = {6: combinatoriality.find_hexachordal_combinatorials,
+                   4: combinatoriality.find_tetrachordal_combinatorials,
+                   3: combinatoriality.find_trichordal_combinatorials}
+        for segment_size, finder in finders.items():
+            masks = combinatoriality.combinatorial_masks(prime_rows, segment_size)
+            for prime_row, mask in zip(prime_rows, masks):
+                self.assertEqual(sorted(combinatoriality.mask_to_transformations(mask)), sorted(finder(prime_row.astype(int))))
+    
 
 class test_note_names(unittest.TestCase):
     
     def test_convert_numbers_to_note_names(self):
         prime_row = np.arange(12)
         self.assertEqual(note_names.convert_numbers_to_note_names(prime_row, note_names.number_to_sharp_treble_clef_positions), ['C5', 'C#5', 'D5', 'D#5', 'E5', 'F4', 'F#4', 'G4', 'G#4', 'A4', 'A#4', 'B4'])
+    
+    def test_vectorized_note_names(self):
+        tone_rows = np.array([np.arange(12), [2, 5, 1, 6, 7, 9, 4, 11, 10, 3, 8, 0]], dtype=np.uint8)
+        names = note_names.numbers_to_note_names(tone_rows)
+        self.assertEqual(names.shape, (2, 12))
+        self.assertEqual(names[1].tolist(), note_names.convert_numbers_to_note_names(tone_rows[1], note_names.number_to_sharp_relations))
+        self.assertEqual(note_names.numbers_to_note_names(tone_rows, treble_clef_positions=True)[0].tolist(), ['C5', 'C#5', 'D5', 'D#5', 'E5', 'F4', 'F#4', 'G4', 'G#4', 'A4', 'A#4', 'B4'])
+        self.assertTrue(np.array_equal(note_names.note_names_to_numbers(names), tone_rows))
+        self.assertEqual(note_names.note_names_to_numbers([["Cb", "E#", "Dbb"]]).tolist(), [[11, 5, 0]])
+        with self.assertRaises(ValueError):
+            note_names.note_names_to_numbers(["H"])
+        with self.assertRaises(TypeError):
+            note_names.note_to_number_relations["H"] = 11
+
+class test_note_name_parser(unittest.TestCase):
+    
+    def test_parse_rows(self):
+        lines = [
+            "# rows of op. 25\n",
+            "C C# D Eb E F F# G Ab A Bb B\n",
+            "E, F, G, Db, Gb, Eb, Ab, D, B, C, A, Bb\n",
+            "\n",
+            "C C C C C C C C C C C C\n",
+            "C; C#; D; Eb; E; F; F#; G; Ab; A; Bb\n",
+            "B# Bb A Ab G Gb F E Eb D Db Cb\n",
+        ]
+        bad_lines = []
+        blocks = list(note_name_parser.parse_rows(lines, block_size=4, errors=bad_lines, line_numbers=True))
+        self.assertEqual(len(blocks), 2)
+        self.assertTrue(np.array_equal(blocks[0][0], np.array([np.arange(12), [4, 5, 7, 1, 6, 3, 8, 2, 11, 0, 9, 10]], dtype=np.uint8)))
+        self.assertEqual(blocks[0][0].dtype, np.uint8)
+        self.assertEqual(blocks[1][1].tolist(), [7])
+        self.assertTrue(np.array_equal(blocks[1][0][0], np.array([0, 10, 9, 8, 7, 6, 5, 4, 3, 2, 1, 11])))
+        self.assertEqual([(error.line_number, error.reason) for error in bad_lines],
+                         [(5, "Row does not contain twelve different notes"), (6, "Line should contain twelve note names")])
+        self.assertEqual(bad_lines[0].line, "C C C C C C C C C C C C")
 
 class test_database_permutation_writer(unittest.TestCase):
     
@@ -149,6 +477,249 @@ class test_database_permutation_writer(unittest.TestCase):
             [3, 2, 1, 0]]
         for i, permutation in enumerate(permutations):
             self.assertEqual(permutation, list(permutation_calculator.find_permutation(i, 4)))
+    
+    def test_find_permutations(self):
+        row_numbers = np.array([0, 1, 15621, 3000000, math.factorial(12) - 1])
+        tone_rows = database_entry_creator.permutation_calculator.find_permutations(row_numbers)
+        for row_number, row in zip(row_numbers, tone_rows):
+            self.assertTrue(np.array_equal(row, database_entry_creator.permutation_calculator.find_permutation(int(row_number))))
+        self.assertTrue(np.array_equal(database_entry_creator.permutation_calculator.find_row_numbers(tone_rows), row_numbers))
+
+class test_numpy_shards(unittest.TestCase):
+    
+    def test_shard_round_trip(self):
+        for compressed in (True, False):
+            with tempfile.TemporaryDirectory() as directory:
+                numpy_shard_writer.write_shards(directory, 100, 350, shard_size=100, batch_size=30, compressed=compressed)
+                reader = numpy_shard_reader(directory)
+                self.assertEqual(reader.row_count, 250)
+                chunks = list(reader.iter_chunks(64, columns=["row_number", "P0", "combinatorial_hexachords"]))
+                self.assertEqual(np.concatenate([chunk["row_number"] for chunk in chunks]).tolist(), list(range(100, 350)))
+                entry = create_database_entry.all_values_entry(349)
+                self.assertTrue(np.array_equal(chunks[-1]["P0"][-1], entry.P0))
+                self.assertEqual(combinatoriality.mask_to_transformations(chunks[-1]["combinatorial_hexachords"][-1]), sorted(entry.combinatorial_hexachords, key=tone_row.transformation_names().index))
+                del chunks
+
+class test_database_verifier(unittest.TestCase):
+    
+    def test_verify_database(self):
+        with tempfile.TemporaryDirectory() as directory:
+            database_name = os.path.join(directory, "test.db")
+            report_path = os.path.join(directory, "report.csv")
+            tone_row_permutations.build_database(database_name, 5)
+            summary = database_verifier.verify_database(database_name, report_path, workers=0)
+            self.assertTrue(summary.passed)
+            self.assertEqual(summary.rows_recomputed, 24)
+            
+            connection = sqlite3.connect(database_name)
+            connection.execute("UPDATE all_values SET combinatorial_tetrachords = '()' WHERE prime_row = '[ 0  1  2  3  4  5  6  7  8  9 10 11]'")
+            connection.execute("DELETE FROM all_values WHERE prime_row = '[ 0  1  2  3  4  5  6  7  8 11  9 10]'")
+            connection.commit()
+            connection.close()
+            summary = database_verifier.verify_database(database_name, report_path, expected_rows=24, workers=0)
+            self.assertEqual((summary.mismatched_rows, summary.missing_rows, summary.duplicate_rows), (1, 1, 0))
+            with open(report_path) as report_file:
+                self.assertIn("mismatch,0,combinatorial_tetrachords", report_file.read())
+
+class test_streaming_pipeline(unittest.TestCase):
+    
+    def test_pipeline_matches_entries(self):
+        stages = [pipeline_stage(prime_transformation_stage()),
+                  pipeline_stage(combinatoriality_stage(), workers=2),
+                  pipeline_stage(filter_stage(lambda chunk: chunk["combinatorial_trichords"] != 0), queue_size=1)]
+        chunks = list(streaming_pipeline.stream(streaming_pipeline.rank_source(0, 5000, chunk_size=700), stages))
+        expected = create_database_entry.all_values_columns(0, 5000)
+        keep = expected.combinatorial_trichords != 0
+        self.assertTrue(np.array_equal(np.concatenate([chunk["row_number"] for chunk in chunks]), expected.row_number[keep]))
+        self.assertTrue(np.array_equal(np.concatenate([chunk["RI0"] for chunk in chunks]), expected.RI0[keep]))
+    
+    def test_pipeline_errors_and_sinks(self):
+        def failing_stage(chunk):
+            raise RuntimeError("stage failed")
+        with self.assertRaises(RuntimeError):
+            streaming_pipeline.run(streaming_pipeline.rank_source(0, 1000, chunk_size=100), [pipeline_stage(failing_stage, workers=2)])
+        with tempfile.TemporaryDirectory() as directory:
+            row_count = streaming_pipeline.run(streaming_pipeline.rank_source(10, 260, chunk_size=100), [], shard_sink(directory))
+            self.assertEqual(row_count, 250)
+            self.assertEqual(numpy_shard_reader(directory).row_count, 250)
+
+class test_shared_universe(unittest.TestCase):
+    
+    def test_attach_shared_universe(self):
+        with shared_universe(100, 400, fix_first_note=True, batch_size=128) as universe:
+            with shared_universe.attach(universe.descriptors) as attached:
+                tone_rows = attached.arrays["P0"]
+                self.assertTrue(np.array_equal(tone_rows[0], np.append(0, permutation_calculator.find_permutation(100) + 1)))
+                self.assertTrue(np.array_equal(attached.arrays["transformations"][299], tone_row.all_transformations(tone_rows[299])))
+                del tone_rows
+
+def count_ascending_rows(tone_rows, first_row_number):
+    return int(np.count_nonzero(np.all(np.diff(tone_rows.astype(int), axis=1) > 0, axis=1)))
+
+class test_universe_scanner(unittest.TestCase):
+    
+    def test_scan_universe(self):
+        self.assertEqual(universe_scanner.scan_universe(count_ascending_rows, operator.add, n=7, fix_first=False, workers=0, chunk_size=100), 1)
+        self.assertEqual(universe_scanner.scan_universe(count_ascending_rows, operator.add, n=7, workers=1, chunk_size=100), 1)
+        collected = universe_scanner.scan_universe(lambda tone_rows, first_row_number: [first_row_number], operator.add, n=6, workers=0, chunk_size=50)
+        self.assertEqual(collected, [0, 50, 100])
+    
+    def test_cancel_scan(self):
+        progress = []
+        with self.assertRaises(scan_cancelled) as cancelled:
+            universe_scanner.scan_universe(count_ascending_rows, operator.add, n=7, workers=0, chunk_size=100,
+                                           progress=lambda rows_scanned, total_rows: progress.append(rows_scanned),
+                                           cancel=lambda: len(progress) == 3)
+        self.assertEqual(cancelled.exception.rows_scanned, 300)
+        self.assertEqual(cancelled.exception.partial_result, 1)
+
+class test_music_xml_template_writer(unittest.TestCase):
+    
+    def normalize_xml(self, xml_text):
+        xml_text = re.sub(r'id="P[0-9a-f]+"', 'id=""', xml_text)
+        return re.sub(r"<software>.*</software>", "", xml_text)
+    
+    @unittest.skipIf(importlib.util.find_spec("music21") is None, "music21 is not installed")
+    def test_same_xml_as_music21(self):
+        from music_xml_writer import music_xml_writer
+        prime_rows = [np.arange(12), np.array([2, 5, 1, 6, 7, 9, 4, 11, 10, 3, 8, 0]), np.array([0, 11, 7, 8, 3, 1, 2, 10, 6, 5, 4, 9])]
+        with tempfile.TemporaryDirectory() as directory:
+            for prime_row in prime_rows:
+                for include_combinatorials in (True, False):
+                    music_xml_writer.write_twelvetone_report(prime_row, "music21.musicxml", directory, "Row & Title", include_combinatorials)
+                    music_xml_writer.write_twelvetone_report(prime_row, "template.musicxml", directory, "Row & Title", include_combinatorials, backend="template")
+                    with open(os.path.join(directory, "music21.musicxml"), encoding="utf-8") as music21_file, open(os.path.join(directory, "template.musicxml"), encoding="utf-8") as template_file:
+                        self.assertEqual(self.normalize_xml(music21_file.read()), self.normalize_xml(template_file.read()))
+    
+    def test_write_to_file_object(self):
+        prime_row = np.arange(12)
+        binary_file = io.BytesIO()
+        music_xml_template_writer.write_twelvetone_report(prime_row, binary_file)
+        xml_text = music_xml_template_writer.create_twelve_tone_report_xml(prime_row)
+        self.assertEqual(self.normalize_xml(binary_file.getvalue().decode("utf-8")), self.normalize_xml(xml_text))
+        self.assertEqual(xml_text.count("<part "), 4 + len(combinatoriality.find_hexachordal_combinatorials(prime_row))
+                         + len(combinatoriality.find_tetrachordal_combinatorials(prime_row)) + len(combinatoriality.find_trichordal_combinatorials(prime_row)))
+        self.assertEqual(set(re.findall(r'<slur number="(\d+)"', xml_text)), {"1", "2", "3", "4", "5", "6"})
+
+    @unittest.skipIf(importlib.util.find_spec("music21") is None, "music21 is not installed")
+    def test_stemless_measure_template(self):
+        from music_xml_writer import music_xml_writer
+        prime_row = np.array([2, 5, 1, 6, 7, 9, 4, 11, 10, 3, 8, 0])
+        first_measure = music_xml_writer.create_stemless_measure("P0", prime_row)
+        second_measure = music_xml_writer.create_stemless_measure("R0", prime_row)
+        self.assertEqual([note.nameWithOctave for note in first_measure.notes], ["D5", "F4", "C#5", "F#4", "G4", "A4", "E5", "B4", "A#4", "D#5", "G#4", "C5"])
+        self.assertEqual([note.offset for note in second_measure.notes], list(range(12)))
+        #time signatures are copies of one prototype that share its meter sequences, but not its sites or style
+        prototype = music_xml_writer.measure_template()[1]
+        first_time_signature, second_time_signature = first_measure.timeSignature, second_measure.timeSignature
+        self.assertIsNot(first_time_signature, second_time_signature)
+        self.assertIs(first_time_signature.beatSequence, prototype.beatSequence)
+        self.assertIsNot(first_time_signature.sites, second_time_signature.sites)
+        self.assertIsNot(first_time_signature.style, prototype.style)
+        self.assertEqual(prototype.sites.getSiteCount(), 0)
+        self.assertIs(first_time_signature.activeSite, first_measure)
+        self.assertTrue(first_time_signature.style.hideObjectOnPrint)
+        self.assertEqual(first_time_signature.ratioString, "12/4")
+
+class test_import_time(unittest.TestCase):
+    
+    def test_core_imports_without_music21(self):
+        #numpy is imported before the timer starts, the time budget only catches an accidental music21 import(seconds)
+        import_script = (
+            "import sys, time, numpy\n"
+            "start = time.perf_counter()\n"
+            "import twelvetone, twelve_tone_matrix, tone_row, combinatoriality, note_names, intervals, music_xml_writer\n"
+            "print(time.perf_counter() - start, 'music21' in sys.modules)\n"
+        )
+        result = subprocess.run([sys.executable, "-c", import_script], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True)
+        import_seconds, music21_imported = result.stdout.split()
+        self.assertEqual(music21_imported, "False")
+        self.assertLess(float(import_seconds), 2)
+
+class test_batch_report_writer(unittest.TestCase):
+    
+    @unittest.skipIf(importlib.util.find_spec("music21") is None, "music21 is not installed")
+    def test_write_reports(self):
+        with tempfile.TemporaryDirectory() as directory:
+            jobs = [
+                (np.arange(12), "chromatic.musicxml"),
+                ([2, 5, 1, 6, 7, 9, 4, 11, 10, 3, 8, 0], "row.musicxml", {"include_combinatorials": False, "backend": "music21"}),
+                (np.arange(12), "missing.musicxml", {"directory": os.path.join(directory, "missing")}),
+            ]
+            with batch_report_writer(workers=1, directory=directory, backend="template") as writer:
+                summary = writer.write_reports(iter(jobs))
+            self.assertEqual([report.file_name for report in summary.reports], ["chromatic.musicxml", "row.musicxml", "missing.musicxml"])
+            self.assertEqual(summary.succeeded, 2)
+            self.assertEqual(len(summary.failed), 1)
+            self.assertTrue(summary.failed[0].error.startswith("ValueError"))
+            self.assertEqual(sorted(os.listdir(directory)), ["chromatic.musicxml", "row.musicxml"])
+
+class test_catalogue_score_writer(unittest.TestCase):
+    
+    def test_write_catalogue(self):
+        prime_rows = np.array([np.arange(12), [2, 5, 1, 6, 7, 9, 4, 11, 10, 3, 8, 0]])
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertEqual(catalogue_score_writer.write_catalogue(prime_rows, os.path.join(directory, "catalogue.musicxml")), 96)
+            self.assertEqual(catalogue_score_writer.write_catalogue(prime_rows, os.path.join(directory, "catalogue.mxl"), forms=["P0", "RI3"]), 4)
+            score = ElementTree.parse(os.path.join(directory, "catalogue.musicxml")).getroot()
+            with zipfile.ZipFile(os.path.join(directory, "catalogue.mxl")) as mxl_file:
+                self.assertEqual(mxl_file.namelist()[0], "mimetype")
+                self.assertIn('full-path="catalogue.musicxml"', mxl_file.read("META-INF/container.xml").decode("utf-8"))
+                mxl_score = ElementTree.fromstring(mxl_file.read("catalogue.musicxml"))
+        part_names = [part_name.text for part_name in score.iter("part-name")]
+        self.assertEqual(part_names[:2] + part_names[-1:], ["Row 1 P0", "Row 1 P1", "Row 2 RI11"])
+        self.assertEqual([part_name.text for part_name in mxl_score.iter("part-name")], ["Row 1 P0", "Row 1 RI3", "Row 2 P0", "Row 2 RI3"])
+        last_part_steps = [step.text for step in score.findall("part")[-1].iter("step")]
+        expected_steps = [note_names.number_to_sharp_treble_clef_positions[note][0] for note in tone_row.get_transformation(prime_rows[1], "RI11")]
+        self.assertEqual(last_part_steps, expected_steps)
+
+class test_midi_writer(unittest.TestCase):
+    
+    def test_midi_bytes(self):
+        prime_row = np.array([2, 5, 1, 6, 7, 9, 4, 11, 10, 3, 8, 0])
+        contents = midi_writer.midi_bytes(tone_row.prime_transformations_list(prime_row), octave=4, durations=960, sequential=True)
+        self.assertEqual(contents[:14], b"MThd" + bytes([0, 0, 0, 6, 0, 1, 0, 5, 1, 224]))
+        self.assertEqual(contents.count(b"MTrk"), 5)
+        first_form_track = contents[contents.index(b"MTrk", 14 + 8):]
+        self.assertIn(b"\x00\xff\x03\x02P0", first_form_track)
+        #note on D4(62), note off after 960 ticks
+        self.assertIn(b"\x00\x90\x3e\x50\x87\x40\x80\x3e\x00", first_form_track)
+        self.assertEqual(midi_writer.variable_length(0x0fffffff), b"\xff\xff\xff\x7f")
+        with self.assertRaises(ValueError):
+            midi_writer.midi_bytes(prime_row, octave=10)
+        for options in ({"velocity": 128}, {"velocity": -1}, {"octave": -2}, {"track_names": ["P0"]}):
+            with self.assertRaises(ValueError):
+                midi_writer.midi_bytes(tone_row.prime_transformations_list(prime_row), **options)
+
+class test_report_cache(unittest.TestCase):
+    
+    def test_cache_hit(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for compressed in (False, True):
+                cache = report_cache(os.path.join(directory, str(compressed)), compressed=compressed)
+                first_report = io.BytesIO()
+                second_report = io.BytesIO()
+                self.assertFalse(cache.write_report(np.arange(12), first_report, "Title"))
+                self.assertTrue(cache.write_report(np.arange(12), second_report, "Title"))
+                self.assertEqual(first_report.getvalue(), second_report.getvalue())
+                self.assertTrue(first_report.getvalue().startswith(b"<?xml"))
+                self.assertFalse(cache.write_report(np.arange(12), io.BytesIO(), "Title", include_combinatorials=False))
+                self.assertEqual(len(cache.cached_reports()), 2)
+    
+    def test_lru_eviction(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = report_cache(directory)
+            prime_rows = [np.roll(np.arange(12), i) for i in range(3)]
+            for i, prime_row in enumerate(prime_rows):
+                cache.write_report(prime_row, io.BytesIO())
+                report_path = cache.report_path(cache.key(prime_row))
+                os.utime(report_path, ns=(i * 10**9, i * 10**9))
+            cache.max_size = cache.size() - 1
+            #using the oldest report makes the second report the least recently used
+            self.assertTrue(cache.write_report(prime_rows[0], io.BytesIO()))
+            cache.evict()
+            self.assertFalse(os.path.exists(cache.report_path(cache.key(prime_rows[1]))))
+            self.assertTrue(os.path.exists(cache.report_path(cache.key(prime_rows[0]))))
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -25,20 +25,17 @@ class tone_row (object):
         Positive numbers indicate upward traversal by a number of semitones.\n
         Range of numbers = [-5: 7]
         
+        Also accepts an array of tone rows with shape (N, 12), in which case
+        the intervals of every row are calculated at once.
+        
         Args:
             tone_row (np.ndarray): 12-tone row
             
         Returns:
             np.ndarray: Differemce in semitones (length = 11)
         """
-        interval_sizes = np.zeros(11, dtype=int)
-        for i in range(11):
-            interval_sizes[i] = tone_row[i+1] - tone_row[i]
-            if interval_sizes[i] > 6:
-                interval_sizes[i] -= 12
-            
-            if interval_sizes[i] < -5:
-                interval_sizes[i] += 12
+        interval_sizes = np.diff(np.asarray(tone_row, dtype=int), axis=-1)
+        interval_sizes = (interval_sizes + 5) % 12 - 5
         
         return interval_sizes
     
@@ -143,7 +140,49 @@ class tone_row (object):
             return np.array([prime_row, cls.prime_retrograde(prime_row), cls.prime_inversion(prime_row), cls.prime_retrograde_inversion(prime_row)])
         
         return np.array([cls.prime_retrograde(prime_row), cls.prime_inversion(prime_row), cls.prime_retrograde_inversion(prime_row)])
-    
+
+    @classmethod
+    def transformation_names(cls) -> list:
+        """
+        Returns the names of all 48 transformations of a tone row
+        in the following order:\n
+        [P0 - P11, R0 - R11, I0 - I11, RI0 - RI11]\n
+
+        The position of a name within this list is used as the transformation's
+        index by all functions that handle transformations in bulk.
+        """
+        return [f"{prefix}{str(i)}" for prefix in ("P", "R", "I", "RI") for i in range(12)]
+
+    @classmethod
+    def prime_transformations_array(cls, prime_rows: np.ndarray) -> np.ndarray:
+        """
+        Returns [P0, R0, I0, RI0] of a tone row as a (4, 12) uint8 array.\n
+        
+        An array of tone rows with shape (N, 12) returns a (N, 4, 12) array, which
+        contains the prime transformations of every row.
+        """
+        prime_rows = np.asarray(prime_rows, dtype=np.int16)
+        first_notes = prime_rows[..., :1]
+        prime_inversions = (2 * first_notes - prime_rows) % 12
+        prime_retrogrades = (np.flip(prime_rows, axis=-1) + first_notes - prime_rows[..., -1:]) % 12
+        prime_ret_invs = (np.flip(prime_inversions, axis=-1) + first_notes - prime_inversions[..., -1:]) % 12
+        return np.stack([prime_rows, prime_retrogrades, prime_inversions, prime_ret_invs], axis=-2).astype(np.uint8)
+
+    @classmethod
+    def all_transformations(cls, prime_rows: np.ndarray) -> np.ndarray:
+        """
+        Returns all 48 transformations of a tone row as a (48, 12) uint8 array,
+        ordered as in transformation_names().\n
+
+        An array of tone rows with shape (N, 12) returns a (N, 48, 12) array, which
+        contains the transformations of every row.
+        """
+        prime_transformations = cls.prime_transformations_array(prime_rows)
+        #(note + semitones) % 12 as a lookup, notes and semitones are both < 12
+        transposed_notes = np.arange(24, dtype=np.uint8) % 12
+        transformations = transposed_notes[prime_transformations[..., :, None, :] + np.arange(12, dtype=np.uint8)[:, None]]
+        return transformations.reshape(prime_transformations.shape[:-2] + (48, 12))
+
     @classmethod
     def transpose_row(cls, tone_row: np.ndarray, semitones: int) -> np.ndarray:
         """
@@ -247,7 +286,29 @@ class tone_row (object):
         """
         if len(tone_row) != 12:
             raise ValueError("Row provided is not the right length. (should be 12 tones long)")
-        sorted_row = np.sort(tone_row)
-        reference_row = np.arange(12)
-        if sorted_row.all() != reference_row.all():
-            raise ValueError("The provided tone row is not a valid 12-tone row")
\ No newline at end of file
+        if cls.validate_rows(np.asarray(tone_row).reshape(1, 12))[0] == False:
+            raise ValueError("The provided tone row is not a valid 12-tone row")
+    
+    @classmethod
+    def validate_rows(cls, tone_rows: np.ndarray, raise_error = False) -> np.ndarray:
+        """
+        Returns a boolean array that is True for every row of tone_rows(shape (..., 12))
+        that contains each note number from 0 to 11 exactly once.\n
+        
+        A row is valid if the OR of 1 << note over its twelve notes is 0xFFF(twelve notes can only
+        set all twelve bits if every note is different).
+        With raise_error = True, raises ValueError with the indices of the invalid rows instead.
+        """
+        tone_rows = np.asarray(tone_rows)
+        if tone_rows.ndim == 0 or tone_rows.shape[-1] != 12:
+            raise ValueError(f"Tone rows should have 12 notes(shape (..., 12)), got shape {tone_rows.shape}")
+        note_numbers = tone_rows.astype(np.int64)
+        #notes outside 0-11 set bit 12, which makes the row invalid
+        note_numbers = np.where((note_numbers >= 0) & (note_numbers < 12) & (note_numbers == tone_rows), note_numbers, 12)
+        valid = np.bitwise_or.reduce(np.left_shift(1, note_numbers), axis=-1) == 0xFFF
+        if raise_error and valid.all() == False:
+            invalid_indices = np.argwhere(~valid)
+            invalid_indices = invalid_indices.ravel() if valid.ndim == 1 else [tuple(int(i) for i in index) for index in invalid_indices]
+            shown_indices = ", ".join(str(index) for index in list(invalid_indices)[:20])
+            raise ValueError(f"{len(invalid_indices)} invalid tone rows at indices: {shown_indices}{', ...' if len(invalid_indices) > 20 else ''}")
+        return valid
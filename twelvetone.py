@@ -1,13 +1,17 @@
 import copy
 import numpy as np
-import music21
 import os
 from tone_row import tone_row
-from music_xml_writer import music_xml_writer
 from note_names import note_names
 from intervals import intervals
 from combinatoriality import combinatoriality
 
+def __getattr__(name):
+    #music_xml_writer(and music21) are only imported when they are used
+    if name == "music_xml_writer":
+        from music_xml_writer import music_xml_writer
+        return music_xml_writer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class twelve_tone_matrix():
@@ -127,7 +131,7 @@ class combinatoriality():
             retrogrades = True
             inversions = True
             inv_retrogrades = True
-        reference_hexachord = prime_row[:6]
+        reference_hexachord = np.array(prime_row[:6])
         reference_hexachord.sort()
         hexachords = []
         if rows == False and retrogrades == False and inversions == False and inv_retrogrades == False:
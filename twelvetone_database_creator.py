@@ -72,23 +72,49 @@ class tone_row_permutations():
             #create object that contains all columns of linked tables
             entry = database_entry_creator.create_database_entry.all_values_entry(i)
             print(f"last row number: {i}, permutation: {entry.P0}")
-            cursor.execute(insert_query, (
-                str(entry.P0),
-                str(entry.R0),
-                str(entry.I0),
-                str(entry.RI0),
-                str(entry.P0_intervals),
-                str(entry.R0_intervals),
-                str(entry.I0_intervals),
-                str(entry.RI0_intervals),
-                str(entry.combinatorial_hexachords),
-                str(entry.combinatorial_tetrachords),
-                str(entry.combinatorial_trichords)
-                ))
+            cursor.execute(insert_query, cls.database_row(entry))
             
             connection.commit()
         connection.close()
     
+    @classmethod
+    def database_columns(cls) -> list:
+        """
+        Returns the column names of the all_values table in the order
+        of the values returned by database_row()
+        """
+        return [
+            "prime_row",
+            "prime_retrograde",
+            "prime_inversion",
+            "prime_retrograde_inversion",
+            "prime_row_intervals",
+            "prime_retrograde_intervals",
+            "prime_inversion_intervals",
+            "prime_retrograde_inversion_intervals",
+            "combinatorial_hexachords",
+            "combinatorial_tetrachords",
+            "combinatorial_trichords"
+            ]
+    
+    @classmethod
+    def database_row(cls, entry: database_entry_creator.all_value_entry) -> tuple:
+        """
+        Returns the values of an entry as they are stored in the all_values table
+        """
+        return (
+            str(entry.P0),
+            str(entry.R0),
+            str(entry.I0),
+            str(entry.RI0),
+            str(entry.P0_intervals),
+            str(entry.R0_intervals),
+            str(entry.I0_intervals),
+            str(entry.RI0_intervals),
+            str(entry.combinatorial_hexachords),
+            str(entry.combinatorial_tetrachords),
+            str(entry.combinatorial_trichords)
+            )
 
 
         
@@ -0,0 +1,121 @@
+import math
+import os
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from database_entry_creator import permutation_calculator
+"""
+Map-reduce over every tone row in the permutation universe(or a range of it).
+
+The universe is split into chunks of consecutive row numbers. Every chunk is converted into a
+(chunk_size, n) uint8 array of tone rows(see permutation_calculator.find_permutations()) inside a
+worker process and passed to a vectorized kernel. The kernel results are combined with a reduce
+function in the calling process, in row number order.
+
+Example(number of rows with hexachordal combinatorials, among the 11! rows that start on note 0):
+
+    def count_hexachordal(tone_rows, first_row_number):
+        return int(np.count_nonzero(combinatoriality.combinatorial_masks(tone_rows, 6)))
+
+    universe_scanner.scan_universe(count_hexachordal, operator.add)
+
+Kernels that are sent to worker processes must be picklable(i.e. defined at module level).
+"""
+class scan_cancelled(Exception):
+    """
+    Raised by scan_universe() when it is cancelled.
+    Holds the reduced result of the chunks that were completed before cancellation.
+    """
+    def __init__(self, partial_result, rows_scanned: int):
+        super().__init__(f"Scan cancelled after {rows_scanned} rows")
+        self.partial_result = partial_result
+        self.rows_scanned = rows_scanned
+
+
+class universe_scanner():
+
+    @classmethod
+    def scan_universe(cls, func, reduce, n = 12, fix_first = True, workers = None, chunk_size = 65_536, initial = None, first_row_number = 0, last_row_number = None, progress = None, cancel = None):
+        """
+        Returns reduce(...reduce(reduce(initial, func(chunk_0)), func(chunk_1))..., func(chunk_last)).\n
+
+        Args:
+            func: kernel called as func(tone_rows, first_row_number), where tone_rows is a (chunk, n) uint8 array
+                and first_row_number is the row number of tone_rows[0]
+            reduce: called as reduce(accumulated_result, kernel_result)
+            n (int): length of the tone rows
+            fix_first (bool): only scan the (n - 1)! rows that start on note 0
+            workers (int): number of worker processes, 0 runs every kernel in the calling process.
+                Defaults to the number of CPUs.
+            initial: first accumulated result. If None, the result of the first chunk is used.
+            first_row_number, last_row_number: scan [first_row_number, last_row_number) instead of the full universe
+            progress: called as progress(rows_scanned, total_rows) after every chunk
+            cancel: threading.Event(or any object with is_set()) or a function returning True once the scan should stop.
+                A cancelled scan raises scan_cancelled.
+        """
+        universe_size = math.factorial(n - 1 if fix_first else n)
+        if last_row_number is None:
+            last_row_number = universe_size
+        if first_row_number < 0 or last_row_number > universe_size or first_row_number >= last_row_number:
+            raise ValueError(f"Invalid row range({first_row_number}, {last_row_number})")
+        if workers is None:
+            workers = os.cpu_count()
+
+        total_rows = last_row_number - first_row_number
+        chunk_ranges = [(chunk_start, min(chunk_start + chunk_size, last_row_number)) for chunk_start in range(first_row_number, last_row_number, chunk_size)]
+        result = initial
+        has_result = initial is not None
+        rows_scanned = 0
+
+        def add_chunk_result(chunk_range, chunk_result):
+            nonlocal result, has_result, rows_scanned
+            result = reduce(result, chunk_result) if has_result else chunk_result
+            has_result = True
+            rows_scanned += chunk_range[1] - chunk_range[0]
+            if progress is not None:
+                progress(rows_scanned, total_rows)
+
+        if workers == 0:
+            for chunk_range in chunk_ranges:
+                if cls.is_cancelled(cancel):
+                    raise scan_cancelled(result, rows_scanned)
+                add_chunk_result(chunk_range, cls.scan_chunk(func, *chunk_range, n, fix_first))
+            return result
+
+        pending_chunks = deque()
+        with ProcessPoolExecutor(workers) as executor:
+            try:
+                for chunk_range in chunk_ranges:
+                    if cls.is_cancelled(cancel):
+                        raise scan_cancelled(result, rows_scanned)
+                    pending_chunks.append((chunk_range, executor.submit(cls.scan_chunk, func, *chunk_range, n, fix_first)))
+                    #keeps every worker busy without submitting the whole universe at once
+                    if len(pending_chunks) >= 2 * workers:
+                        chunk_range, future = pending_chunks.popleft()
+                        add_chunk_result(chunk_range, future.result())
+                while pending_chunks:
+                    if cls.is_cancelled(cancel):
+                        raise scan_cancelled(result, rows_scanned)
+                    chunk_range, future = pending_chunks.popleft()
+                    add_chunk_result(chunk_range, future.result())
+            except BaseException:
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+        return result
+
+    @classmethod
+    def scan_chunk(cls, func, first_row_number: int, last_row_number: int, n: int, fix_first: bool):
+        """
+        Runs a kernel on the tone rows of [first_row_number, last_row_number)
+        """
+        tone_rows = permutation_calculator.find_permutations(np.arange(first_row_number, last_row_number), n, fix_first)
+        return func(tone_rows, first_row_number)
+
+    @classmethod
+    def is_cancelled(cls, cancel) -> bool:
+        if cancel is None:
+            return False
+        if hasattr(cancel, "is_set"):
+            return cancel.is_set()
+        return bool(cancel())
+